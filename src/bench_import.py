@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+"""Check that importing pymnash and using it without symbolic solving doesn't import sympy, and time the imports.
+   Each check runs in a fresh interpreter. Exits with status 1 if sympy was loaded or an import was too slow."""
+
+import json
+import subprocess
+import sys
+
+# name -> code to run, none of these should need sympy
+checks = {'import game': 'import pymnash.game',
+          'import all': 'import pymnash.game, pymnash.sample_games, pymnash.nash_dag, pymnash.patrik, '
+                        'pymnash.anonymous_game, pymnash.polymatrix, pymnash.batch, pymnash.async_solve',
+          'find_pure': 'from pymnash.sample_games import stag_hunt; list(stag_hunt(4, 2).find_pure())',
+          'iesds': 'from pymnash.sample_games import reducible; reducible(3).iesds()',
+          'is_nash': 'from pymnash.sample_games import chicken; chicken(3).is_nash([[1, 0], [1, 0], [0, 1]])',
+          'numeric find_all_equilibria': 'from pymnash.game import Game; from pymnash.sample_games import '
+                                         'battle_of_genders; '
+                                         'list(Game(battle_of_genders(2).payoffs, numeric=True).find_all_equilibria())',
+         }
+
+# run in the child: time the code and report whether sympy got loaded
+template = '''
+import json, sys, time
+start = time.perf_counter()
+{}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'sympy': 'sympy' in sys.modules}}))
+'''
+
+# tracemalloc slows imports down a lot, so memory is measured in a separate run
+memory_template = '''
+import json, tracemalloc
+tracemalloc.start()
+{}
+print(json.dumps({{'peak_bytes': tracemalloc.get_traced_memory()[1]}}))
+'''
+
+def run_code(code):
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def run_check(code):
+    result = run_code(template.format(code))
+    result.update(run_code(memory_template.format(code)))
+    return result
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    parser = ArgumentParser()
+    parser.add_argument('--max-seconds', type=float, default=0.5, dest='max_seconds',
+                        help='fail if any check takes longer than this')
+    parser.add_argument('--sympy', action='store_true', help='also time importing sympy, for comparison')
+    args = parser.parse_args()
+    failed = []
+    if args.sympy:
+        checks['import sympy'] = 'import sympy'
+    for name, code in checks.items():
+        result = run_check(code)
+        print('{:30s} seconds {:.3f} peak_kb {:8d} sympy loaded {}'.format(name, result['seconds'],
+              result['peak_bytes'] // 1024, result['sympy']))
+        if name == 'import sympy':
+            continue
+        if result['sympy']:
+            failed.append('{} loaded sympy'.format(name))
+        if result['seconds'] > args.max_seconds:
+            failed.append('{} took {:.3f} seconds'.format(name, result['seconds']))
+    for failure in failed:
+        print(failure)
+    if failed:
+        sys.exit(1)
+
+# ./bench_import.py --sympy
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+
+"""Benchmark the Game solver stages on the sample games and the Patrik DAG over a range of sizes.
+   Results (time and peak memory per stage) are saved as JSON so runs from different commits can be compared,
+   and --compare flags stages which got slower by more than a threshold."""
+
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from pymnash.sample_games import *
+from pymnash.patrik import Patrik
+
+# generator name -> list of argument tuples, smallest first
+sweeps = {'battle_of_genders': [(2,), (3,)],
+          'detente_of_genders': [(3, 2), (4, 2), (5, 2)],
+          'reducible': [(2,), (3,), (4,)],
+          'dunderheads': [(2,), (3,), (4,)],
+          'prisoners_dilemma': [(2,), (3,), (4,)],
+          'matching_pennies': [(2,), (3,)],
+          'how_low_dare_you_go': [(2, 3), (3, 3), (3, 4)],
+          'mixed_dom': [(2, 2), (2, 3), (2, 4)],
+          'chicken': [(2,), (3,), (4,)],
+          'stag_hunt': [(2, 1), (3, 2), (4, 2)],
+          'all_pay_auction': [(2, 2), (2, 3), (3, 2)],
+         }
+
+stages = ['generate', 'find_pure', 'iesds', 'is_nash', 'find_all_equilibria']
+
+
+def support_count(agame):
+    """Number of supports find_all_equilibria has to try."""
+    return int(np.prod([2 ** agame.num_actions(player) - 1 for player in range(agame.player_count)]))
+
+def run_stage(stage, agame):
+    """Run one solver stage on the game."""
+    if stage == 'find_pure':
+        return list(agame.find_pure())
+    if stage == 'iesds':
+        return agame.iesds()
+    if stage == 'is_nash':
+        # a pure profile with every player playing action 0, checked once per cell of the payoffs
+        profile = [[1] + [0] * (agame.num_actions(player) - 1) for player in range(agame.player_count)]
+        for ii in range(min(agame.payoffs.size, 1000)):
+            agame.is_nash(profile)
+        return None
+    if stage == 'find_all_equilibria':
+        return list(agame.find_all_equilibria())
+    raise ValueError('Unknown stage {}'.format(stage))
+
+def measure(setup, fun, repeat, memory):
+    """Call setup (untimed) and pass the result to fun (timed), repeat times.
+       Return (best seconds of repeat runs, peak bytes allocated or None)."""
+    best = None
+    for ii in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        fun(arg)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    peak = None
+    if memory:
+        # tracemalloc slows things down a lot, so memory is measured in a separate run
+        arg = setup()
+        tracemalloc.start()
+        fun(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best, peak
+
+def bench_games(names, repeat, memory, max_supports):
+    results = []
+    for name in names:
+        for args in sweeps[name]:
+            fun = globals()[name]
+            agame = fun(*args)
+            for stage in stages:
+                if stage == 'find_all_equilibria' and support_count(agame) > max_supports:
+                    continue
+                if stage == 'generate':
+                    seconds, peak = measure(lambda: args, lambda fun_args: fun(*fun_args), repeat, memory)
+                else:
+                    # a fresh game each time, so cached results don't carry over
+                    seconds, peak = measure(lambda: fun(*args), lambda fresh: run_stage(stage, fresh),
+                                            repeat, memory)
+                result = {'game': name, 'args': list(args), 'stage': stage, 'cells': int(agame.payoffs.size),
+                          'seconds': seconds, 'peak_bytes': peak}
+                print_result(result)
+                results.append(result)
+    return results
+
+def patrik_node(depth):
+    """Return the Patrik DAG and the first non-terminal node with the given number of prior guesses
+       (the root has -1, solving from there solves the whole game)."""
+    dag = Patrik()
+    for key in sorted(dag.nodes, key=str):
+        node = dag.nodes[key]
+        if node.prior_guesses == depth and not node.terminal:
+            return dag, node
+    raise ValueError('No node at depth {}'.format(depth))
+
+def bench_patrik(depths, repeat, memory):
+    results = []
+    seconds, peak = measure(lambda: None, lambda unused: Patrik(), repeat, memory)
+    result = {'game': 'patrik', 'args': [], 'stage': 'generate', 'cells': None, 'seconds': seconds,
+              'peak_bytes': peak}
+    print_result(result)
+    results.append(result)
+    for depth in depths:
+        def solve(dag_node):
+            dag, node = dag_node
+            dag.set_subscores(node)
+        seconds, peak = measure(lambda: patrik_node(depth), solve, repeat, memory)
+        result = {'game': 'patrik', 'args': [depth], 'stage': 'set_subscores', 'cells': None,
+                  'seconds': seconds, 'peak_bytes': peak}
+        print_result(result)
+        results.append(result)
+    return results
+
+def print_result(result):
+    print('{:22s} {:12s} {:20s} cells {:>9} seconds {:10.5f} peak_kb {}'.format(result['game'],
+          str(tuple(result['args'])), result['stage'], str(result['cells']), result['seconds'],
+          'n/a' if result['peak_bytes'] is None else result['peak_bytes'] // 1024))
+
+def print_curves(results):
+    """Show how the time for each game and stage grows with the size of the game."""
+    print('')
+    print('scaling (time ratio to the previous size):')
+    series = {}
+    for result in results:
+        series.setdefault((result['game'], result['stage']), []).append(result)
+    for (game, stage), points in series.items():
+        if len(points) < 2:
+            continue
+        pieces = []
+        previous = None
+        for point in points:
+            ratio = '' if previous is None or previous['seconds'] == 0 else \
+                    ' x{:.1f}'.format(point['seconds'] / previous['seconds'])
+            pieces.append('{}{}'.format(tuple(point['args']), ratio))
+            previous = point
+        print('{:22s} {:20s} {}'.format(game, stage, ' -> '.join(pieces)))
+
+def compare(results, old_file, threshold, min_seconds):
+    """Compare with results saved by an earlier run. Returns a list of regression descriptions."""
+    with open(old_file) as fh:
+        old = json.load(fh)
+    old_results = {(elm['game'], tuple(elm['args']), elm['stage']): elm for elm in old['results']}
+    regressions = []
+    for result in results:
+        key = (result['game'], tuple(result['args']), result['stage'])
+        if key not in old_results:
+            continue
+        before = old_results[key]['seconds']
+        after = result['seconds']
+        # ignore stages too fast to time reliably
+        if max(before, after) < min_seconds:
+            continue
+        if after > before * (1 + threshold):
+            regressions.append('{} {} {}: {:.5f}s -> {:.5f}s'.format(key[0], key[1], key[2], before, after))
+    return regressions
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    import sympy
+    return {'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+            'sympy': sympy.__version__, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    parser = ArgumentParser()
+    parser.add_argument('--games', nargs='*', default=None, help='games to benchmark (default all)')
+    parser.add_argument('--repeat', type=int, default=1, help='run each stage this many times and keep the best')
+    parser.add_argument('--no-memory', action='store_true', dest='no_memory', help='skip peak memory measurement')
+    parser.add_argument('--max-supports', type=int, default=30, dest='max_supports',
+                        help='skip find_all_equilibria for games with more supports than this')
+    parser.add_argument('--patrik-depths', type=int, nargs='*', default=[1], dest='patrik_depths',
+                        help='solve the Patrik DAG from a node with each number of prior guesses '
+                             '(0 takes minutes, -1 is the whole game)')
+    parser.add_argument('--no-patrik', action='store_true', dest='no_patrik')
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--compare', help='JSON file from an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='flag stages more than this fraction slower than in the compared run')
+    parser.add_argument('--min-seconds', type=float, default=0.005, dest='min_seconds',
+                        help='ignore stages faster than this when comparing')
+    args = parser.parse_args()
+    names = args.games if args.games else list(sweeps.keys())
+    results = bench_games(names, args.repeat, not args.no_memory, args.max_supports)
+    if not args.no_patrik:
+        results.extend(bench_patrik(args.patrik_depths, args.repeat, not args.no_memory))
+    print_curves(results)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump({'meta': metadata(), 'results': results}, fh, indent=1)
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold, args.min_seconds)
+        print('')
+        print('{} regressions beyond {:.0%}'.format(len(regressions), args.threshold))
+        for regression in regressions:
+            print(regression)
+        if regressions:
+            sys.exit(1)
+
+# ./bench_sample_games.py --output before.json
+# ./bench_sample_games.py --compare before.json --games stag_hunt chicken --no-patrik
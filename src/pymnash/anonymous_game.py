@@ -0,0 +1,251 @@
+"""A class for anonymous games, where a player's payoff only depends on his own action and on how many
+   of the other players chose each action, not on who they are.
+   Payoffs are stored per (own action, count vector) so games with many players can be analyzed without
+   building the dense payoff tensor used by Game, which has m ** n * n elements."""
+
+from math import lgamma
+import numpy as np
+
+from .game import Game
+from .util import compositions, iterindices
+from .events import EventSource
+
+
+class AnonymousGame(EventSource):
+    """ A class for a multi-player anonymous game."""
+
+    def __init__(self, num_players, num_actions, payoffs, player_types=None, verbose=False):
+        """Payoffs is an np.array of floats with shape (types, actions, count vectors).
+           payoffs[t, a, k] is the payoff to a player of type t playing action a when the other players'
+           actions are counted by count_vectors[k] (a tuple, how many others play each action).
+           Player_types is a list with the type of each player, if omitted all players have type 0."""
+        self.verbose = verbose
+        self.player_count = num_players
+        self.action_count = num_actions
+        if player_types is None:
+            player_types = [0] * num_players
+        if len(player_types) != num_players:
+            raise Exception('There must be one player type per player')
+        self.player_types = list(player_types)
+        self.count_vectors = list(compositions(num_players - 1, num_actions))
+        self._count_index = {counts: ii for ii, counts in enumerate(self.count_vectors)}
+        if type(payoffs) != np.ndarray:
+            raise Exception('Payoffs must be numpy array')
+        expected = (max(self.player_types) + 1, num_actions, len(self.count_vectors))
+        if payoffs.shape != expected:
+            raise Exception('Payoffs shape {} should be {}'.format(payoffs.shape, expected))
+        self.payoffs = payoffs
+        self._counts_array = np.array(self.count_vectors, dtype=int)
+        # log of the multinomial coefficient for each count vector, for symmetric mixes
+        log_fact = np.array([lgamma(ii + 1) for ii in range(num_players)])
+        self._log_multinomial = log_fact[num_players - 1] - log_fact[self._counts_array].sum(axis=1)
+        self._wiggle = 0.000001
+
+    def __repr__(self):
+        return 'players {} actions {} player_types {}'.format(self.player_count, self.action_count,
+                                                             self.player_types)
+
+    def num_actions(self, player):
+        """Return the number of availabel actions for the player with given index. Returns an int."""
+        return self.action_count
+
+    def num_players(self):
+        """Return the number of players for this game"""
+        return self.player_count
+
+    def eq(self, val1, val2):
+        """Check whether val1 and val2 are 'close enough' to count as equal."""
+        return val1 + self._wiggle > val2 and val2 + self._wiggle > val1
+
+    def gt(self, val1, val2):
+        """Check whether val1 > val2, giving ourselves a little 'wiggle room' for rounding errors."""
+        return val1 > val2 + self._wiggle
+
+    def payoff(self, player, action, counts):
+        """Return the payoff to player for playing action when the others' actions are counted by counts."""
+        return self.payoffs[self.player_types[player], action, self._count_index[tuple(counts)]]
+
+    def counts_distribution(self, mixes):
+        """Given the mixed strategies of the other players (a list of lists of probabilities),
+           find the probability of each count vector. Returns an np.array indexed like count_vectors."""
+        mixes = [np.asarray(mix, dtype=float) for mix in mixes]
+        if len(mixes) != self.player_count - 1:
+            raise Exception('There must be one mix for each other player')
+        if len(mixes) == 0:
+            return np.ones(1)
+        if all(np.array_equal(mix, mixes[0]) for mix in mixes[1:]):
+            return self._multinomial(mixes[0])
+        # Add the other players one at a time, keeping track of the distribution of counts so far.
+        # There are at most len(count_vectors) states at each step, so this is polynomial in the players.
+        dist = {(0,) * self.action_count: 1.0}
+        for mix in mixes:
+            newdist = {}
+            for counts, prob in dist.items():
+                for action, action_prob in enumerate(mix):
+                    if action_prob == 0:
+                        continue
+                    there = list(counts)
+                    there[action] += 1
+                    there = tuple(there)
+                    newdist[there] = newdist.get(there, 0.0) + prob * action_prob
+            dist = newdist
+        result = np.zeros(len(self.count_vectors))
+        for counts, prob in dist.items():
+            result[self._count_index[counts]] = prob
+        return result
+
+    def _multinomial(self, mix):
+        """Probability of each count vector when all the other players play the same mix."""
+        played = mix > 0
+        log_mix = np.zeros(len(mix))
+        log_mix[played] = np.log(mix[played])
+        # 0 ** 0 is 1, so actions nobody plays don't matter even if their probability is zero,
+        # but a count vector where some other player plays an action with probability zero is impossible
+        impossible = (self._counts_array[:, ~played] > 0).any(axis=1)
+        result = np.exp(self._log_multinomial + self._counts_array @ log_mix)
+        result[impossible] = 0.0
+        return result
+
+    def _dense_profile(self, profile):
+        """Profiles may be given either as a list of lists of probabilities (as for Game.is_nash) or as a list of
+           lists of [action, probability] pairs (as for Game.get_profile_payoffs).
+           Returns the profile as a list of lists of probabilities."""
+        result = []
+        for player_profile in profile:
+            player_profile = list(player_profile)
+            if player_profile and type(player_profile[0]) in (list, tuple):
+                dense = [0.0] * self.action_count
+                for action, prob in player_profile:
+                    dense[action] = float(prob)
+                player_profile = dense
+            result.append(player_profile)
+        return result
+
+    def action_payoffs(self, player, profile):
+        """Find the expected payoff to player for each of his actions, given the profile of everyone
+           (the player's own entry is ignored). Returns an np.array."""
+        profile = self._dense_profile(profile)
+        others = [mix for ii, mix in enumerate(profile) if ii != player]
+        dist = self.counts_distribution(others)
+        return self.payoffs[self.player_types[player]] @ dist
+
+    def get_profile_payoffs(self, profile):
+        """Find all player payoffs given the strategy profile. Returns a list of floats.
+           Unlike Game.get_profile_payoffs, the profile may be either a list of lists of probabilities or
+           a list of lists of [action, probability] pairs."""
+        profile = self._dense_profile(profile)
+        payoffs = []
+        for player in range(self.player_count):
+            payoffs.append(float(np.dot(self.action_payoffs(player, profile), profile[player])))
+        return payoffs
+
+    def is_nash(self, profile):
+        """Check if the supplied strategy profile is a nash equilibrium.
+           Profile is a list of lists, each list is strategy profile for one player.
+           [action, probability] pairs are also accepted, as for get_profile_payoffs.
+           Returns a boolean."""
+        profile = self._dense_profile(profile)
+        for player, player_profile in enumerate(profile):
+            if min(player_profile) < 0:
+                raise Exception('negative probability')
+            if not self.eq(sum(player_profile), 1):
+                raise Exception('probabilities do not sum to 1')
+        for player, player_profile in enumerate(profile):
+            utilities = self.action_payoffs(player, profile)
+            support_utilities = [utilities[action] for action, prob in enumerate(player_profile) if prob > 0]
+            best = max(utilities)
+            for utility in support_utilities:
+                if self.gt(best, utility):
+                    if self._subscribers:
+                        self._emit('nash_rejected', player=player, utilities=utilities)
+                    return False
+        return True
+
+    def find_pure_counts(self):
+        """Find the pure nash equilibria, described by how many players of each type play each action.
+           Returns a list of tuples, one entry per equilibrium, with one count vector per player type."""
+        num_types = self.payoffs.shape[0]
+        type_sizes = [self.player_types.count(player_type) for player_type in range(num_types)]
+        type_counts = [list(compositions(size, self.action_count)) for size in type_sizes]
+        eq = []
+        for choice in iterindices([len(elm) for elm in type_counts]):
+            counts = [type_counts[player_type][ii] for player_type, ii in enumerate(choice)]
+            total = np.sum(counts, axis=0)
+            is_nash = True
+            for player_type, type_count in enumerate(counts):
+                for action in range(self.action_count):
+                    if type_count[action] == 0:
+                        continue
+                    others = list(total)
+                    others[action] -= 1
+                    utilities = self.payoffs[player_type, :, self._count_index[tuple(others)]]
+                    if self.gt(max(utilities), utilities[action]):
+                        is_nash = False
+                        break
+                if not is_nash:
+                    break
+            if self._subscribers:
+                self._emit('pure_checked', counts=counts, is_nash=is_nash)
+            if is_nash:
+                eq.append(tuple(counts))
+        return eq
+
+    def find_pure(self):
+        """Find any pure nash equilibria for this game. Yields tuples, one per equilibrium found,
+           each tuple is the actions for each player.
+           There is an equilibrium for each way of assigning the counts found by find_pure_counts to the
+           players, which can be exponentially many (for example about 2 ** n for dunderheads),
+           so for large games use find_pure_counts instead."""
+        for counts in self.find_pure_counts():
+            yield from self._arrangements(counts)
+
+    def _arrangements(self, counts):
+        """Generate all action tuples in which the players of each type play their actions as counted."""
+        actions = [None] * self.player_count
+        remaining = [list(type_count) for type_count in counts]
+
+        def assign(player):
+            if player == self.player_count:
+                yield tuple(actions)
+                return
+            player_type = self.player_types[player]
+            for action in range(self.action_count):
+                if remaining[player_type][action] == 0:
+                    continue
+                remaining[player_type][action] -= 1
+                actions[player] = action
+                yield from assign(player + 1)
+                remaining[player_type][action] += 1
+
+        return assign(0)
+
+    def to_game(self, max_cells=1000000):
+        """Build the equivalent Game with a dense payoff tensor. Only use this for small games."""
+        shape = [self.action_count] * self.player_count
+        cells = self.action_count ** self.player_count * self.player_count
+        if cells > max_cells:
+            raise Exception('Dense payoffs would have {} elements, more than max_cells'.format(cells))
+        payoffs = np.zeros(tuple(shape + [self.player_count]), dtype=float)
+        for pos in iterindices(shape):
+            total = np.bincount(pos, minlength=self.action_count)
+            for player, action in enumerate(pos):
+                others = total.copy()
+                others[action] -= 1
+                payoffs[pos + (player,)] = self.payoff(player, action, others)
+        return Game(payoffs)
+
+
+def anonymous_game_from_function(num_players, num_actions, fun, player_types=None):
+    """Factory method to create an anonymous game from a payoff function.
+       fun(player_type, action, counts) returns the payoff to a player of the given type playing action
+       when counts (a tuple) is how many other players play each action."""
+    if player_types is None:
+        player_types = [0] * num_players
+    num_types = max(player_types) + 1
+    count_vectors = list(compositions(num_players - 1, num_actions))
+    payoffs = np.zeros((num_types, num_actions, len(count_vectors)), dtype=float)
+    for player_type in range(num_types):
+        for action in range(num_actions):
+            for ii, counts in enumerate(count_vectors):
+                payoffs[player_type, action, ii] = fun(player_type, action, counts)
+    return AnonymousGame(num_players, num_actions, payoffs, player_types)
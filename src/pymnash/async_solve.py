@@ -0,0 +1,80 @@
+"""Solving games from asyncio code without blocking the event loop.
+   The solver runs in worker threads, the event loop only hands out the next step and waits for it.
+   A semaphore bounds how many solves run at once, so many concurrent requests share a fixed pool of workers."""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .control import CancelToken
+
+_DONE = object() # returned by next() when the generator is exhausted
+
+
+class AsyncSolver(object):
+    """ Runs find_all_equilibria for asyncio code in a pool of worker threads."""
+
+    def __init__(self, max_concurrent=None, executor=None):
+        """At most max_concurrent solves run at once (the number of cpus by default), others wait their turn.
+           Executor runs the solver steps, by default a ThreadPoolExecutor with max_concurrent threads.
+           The executor has to run callables in this process (threads), since the solve is a generator which
+           is stepped one equilibrium at a time."""
+        if max_concurrent is None:
+            max_concurrent = os.cpu_count() or 1
+        self.max_concurrent = max_concurrent
+        self._own_executor = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max_concurrent)
+        self.executor = executor
+        self._semaphore = None # created on first use, inside the running event loop
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    async def iter_equilibria(self, game, **kwargs):
+        """Async iterator over the equilibria of game, the arguments are those of find_all_equilibria.
+           Cancelling the task (or leaving the loop early) cancels the solve, the worker stops at the next
+           support and its slot is released once it has."""
+        loop = asyncio.get_running_loop()
+        token = kwargs.pop('cancel', None)
+        if token is None:
+            token = CancelToken()
+        async with self._get_semaphore():
+            equilibria = game.find_all_equilibria(cancel=token, **kwargs)
+            try:
+                while True:
+                    future = loop.run_in_executor(self.executor, next, equilibria, _DONE)
+                    try:
+                        equilibrium = await asyncio.shield(future)
+                    except asyncio.CancelledError:
+                        token.cancel()
+                        # keep the slot until the worker notices, so the pool is never oversubscribed
+                        await asyncio.wait([future])
+                        raise
+                    if equilibrium is _DONE:
+                        break
+                    yield equilibrium
+            finally:
+                token.cancel()
+                equilibria.close()
+
+    async def find_all_equilibria(self, game, **kwargs):
+        """Return a list of all the equilibria of game, the arguments are those of find_all_equilibria."""
+        return [equilibrium async for equilibrium in self.iter_equilibria(game, **kwargs)]
+
+    def shutdown(self):
+        """Shut down the executor if the solver created it."""
+        if self._own_executor:
+            self.executor.shutdown()
+
+
+_default_solver = None
+
+def default_solver():
+    """Return the AsyncSolver shared by Game.afind_all_equilibria and Game.aiter_equilibria."""
+    global _default_solver
+    if _default_solver is None:
+        _default_solver = AsyncSolver()
+    return _default_solver
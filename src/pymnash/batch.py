@@ -0,0 +1,122 @@
+"""Solving many games at once in a pool of worker processes.
+   The payoffs of all the games are copied once into a single block of shared memory, which the workers read
+   without copying. Workers take games from a shared queue, biggest first, so a worker which finishes early
+   just takes the next game instead of waiting for one big game to finish, and results are yielded as soon as
+   each game is solved."""
+
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .game import Game, _count_supports
+
+
+def _game_items(games):
+    """Return a list of (game_id, game) from a dict of games or any other iterable of games."""
+    if isinstance(games, dict):
+        return list(games.items())
+    return list(enumerate(games))
+
+def _run_method(game, method, kwargs):
+    result = getattr(game, method)(**kwargs)
+    if result is not None and not isinstance(result, (list, tuple, dict)):
+        result = list(result) # generators such as find_all_equilibria
+    return result
+
+def _game_settings(game):
+    """The settings a worker needs to rebuild game the same way. Stats and subscribers stay with the original
+       game, they can't be shared with another process."""
+    return {'player_labels': game.player_labels, 'action_labels': game.action_labels, 'numeric': game.numeric,
+            'wiggle': game._wiggle}
+
+def _rebuild_game(payoffs, settings):
+    game = Game(payoffs, player_labels=settings['player_labels'], action_labels=settings['action_labels'],
+                numeric=settings['numeric'])
+    game._wiggle = settings['wiggle']
+    return game
+
+def _worker(arena_name, tasks, results, method, kwargs):
+    """Solve games from the tasks queue until a None task, putting (game_id, result) on the results queue."""
+    arena = shared_memory.SharedMemory(name=arena_name)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            game_id, offset, shape, settings = task
+            payoffs = np.ndarray(shape, dtype=float, buffer=arena.buf, offset=offset)
+            try:
+                result = _run_method(_rebuild_game(payoffs, settings), method, kwargs)
+            except Exception as exc:
+                result = exc
+            del payoffs
+            results.put((game_id, result))
+    finally:
+        arena.close()
+
+def solve_many(games, workers=None, method='find_all_equilibria', **kwargs):
+    """Solve every game in games (a dict of game_id: Game, or a list of games whose ids are their indices) by
+       calling method on it with kwargs. Yields (game_id, result) as games are solved, in no particular order.
+       Results which are generators, like find_all_equilibria's, are turned into lists. If solving a game raises an
+       exception, the exception is the result.
+       Workers is the number of worker processes (the number of cpus by default), 0 solves the games one by one
+       in this process. Lazy payoffs are evaluated in full before being shared. Workers rebuild each game with its
+       labels, numeric mode and wiggle, but stats and subscribers are only used when workers is 0."""
+    items = _game_items(games)
+    if workers == 0:
+        for game_id, game in items:
+            try:
+                yield game_id, _run_method(game, method, kwargs)
+            except Exception as exc:
+                yield game_id, exc
+        return
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if not items:
+        return
+    arrays = [np.ascontiguousarray(np.asarray(game.payoffs), dtype=float) for game_id, game in items]
+    offsets = np.concatenate([[0], np.cumsum([array.nbytes for array in arrays])]).astype(int)
+    arena = shared_memory.SharedMemory(create=True, size=max(int(offsets[-1]), 1))
+    processes = []
+    try:
+        for array, offset in zip(arrays, offsets):
+            np.ndarray(array.shape, dtype=float, buffer=arena.buf, offset=offset)[...] = array
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+        else:
+            context = multiprocessing.get_context('spawn')
+        tasks = context.Queue()
+        results = context.Queue()
+        # biggest games first, so one big game started last doesn't keep everyone waiting
+        order = sorted(range(len(items)), key=lambda ii: -_count_supports(arrays[ii].shape[:-1]))
+        for ii in order:
+            game_id, game = items[ii]
+            tasks.put((game_id, int(offsets[ii]), arrays[ii].shape, _game_settings(game)))
+        workers = min(workers, len(items))
+        for ii in range(workers):
+            tasks.put(None)
+        for ii in range(workers):
+            process = context.Process(target=_worker, args=(arena.name, tasks, results, method, kwargs))
+            process.start()
+            processes.append(process)
+        remaining = len(items)
+        while remaining:
+            try:
+                game_id, result = results.get(timeout=1)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    raise Exception('All worker processes exited with {} games unsolved'.format(remaining))
+                continue
+            remaining -= 1
+            yield game_id, result
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        arena.close()
+        arena.unlink()
@@ -0,0 +1,80 @@
+"""Pure equilibria by best response dynamics, and exact potential games, where those dynamics always work.
+   A game is an exact potential game if there is one function of the action profile, the potential, which
+   changes by exactly as much as the deviating player's payoff whenever one player changes action. Every
+   improving move then raises the potential, so best response dynamics can't cycle and stop at a pure
+   equilibrium, and the profile with the highest potential is one.
+   Many walkers, each at a pure profile, take best response steps side by side, one player at a time, reading
+   just the payoffs of that player's actions at each walker's profile."""
+
+import numpy as np
+
+from .control import stop_reason
+
+
+def potential_function(payoffs, tolerance=1e-9):
+    """Payoffs is an np.array of numbers, shape actions + (players,).
+       Returns an np.array with the potential of each action profile, or None if the game isn't an exact potential
+       game. It is one if and only if for every two players i and j, going round the four profiles of i and j
+       switching between neighbouring actions (the others fixed) the payoff changes of the player moving add up
+       to zero (Monderer and Shapley). That is the mixed difference of i's payoffs over the i and j axes
+       matching j's. The potential is then built up one player at a time from the profile where everyone plays
+       action 0."""
+    payoffs = np.asarray(payoffs, dtype=float)
+    num_players = payoffs.shape[-1]
+    scale = max(1.0, np.abs(payoffs).max())
+    for player in range(num_players):
+        own = np.diff(payoffs[..., player], axis=player)
+        for other in range(player + 1, num_players):
+            theirs = np.diff(payoffs[..., other], axis=other)
+            if np.abs(np.diff(own, axis=other) - np.diff(theirs, axis=player)).max(initial=0) > tolerance * scale:
+                return None
+    action_shape = payoffs.shape[:-1]
+    potential = np.zeros(action_shape)
+    for player in range(num_players):
+        # player's payoff change moving from action 0 with the earlier players at their actions and the later
+        # ones at action 0
+        key = (slice(None),) * (player + 1) + (0,) * (num_players - player - 1) + (player,)
+        moved = payoffs[key]
+        change = moved - moved[(slice(None),) * player + (slice(0, 1),)]
+        potential += change.reshape(change.shape + (1,) * (num_players - player - 1))
+    return potential
+
+def walk(lookup, action_shape, starts, max_rounds=100, tolerance=1e-9, deadline=None, cancel=None):
+    """Best response dynamics from each row of starts, an int np.array of pure profiles (walkers, players).
+       Lookup takes an int np.array of profiles (cells, players) and returns their payoffs (cells, players).
+       In each round every player in turn moves each walker to his best response if it does better than his
+       current action by more than tolerance. A walker has converged, at a pure nash equilibrium, once every
+       player in a row has kept his action. Walkers stop after max_rounds rounds, at deadline or when cancel is
+       cancelled.
+       Returns a dict with the final profiles, converged (a boolean np.array), the rounds done and the status
+       ('complete', 'max_rounds', 'deadline' or 'cancelled')."""
+    profiles = np.array(starts, dtype=int)
+    num_walkers, num_players = profiles.shape
+    unchanged = np.zeros(num_walkers, dtype=int) # players in a row who kept their action
+    converged = np.zeros(num_walkers, dtype=bool)
+    status = 'max_rounds'
+    rounds = 0
+    while rounds < max_rounds:
+        reason = stop_reason(deadline, cancel)
+        if reason is not None:
+            status = reason
+            break
+        rounds += 1
+        for player in range(num_players):
+            active = np.flatnonzero(~converged)
+            if not len(active):
+                break
+            num_actions = action_shape[player]
+            cells = np.repeat(profiles[active], num_actions, axis=0)
+            cells[:, player] = np.tile(np.arange(num_actions), len(active))
+            utilities = lookup(cells)[:, player].reshape(len(active), num_actions)
+            rows = np.arange(len(active))
+            best = np.argmax(utilities, axis=1)
+            improves = utilities[rows, best] > utilities[rows, profiles[active, player]] + tolerance
+            profiles[active[improves], player] = best[improves]
+            unchanged[active] = np.where(improves, 0, unchanged[active] + 1)
+            converged[active] = unchanged[active] >= num_players
+        if converged.all():
+            status = 'complete'
+            break
+    return {'profiles': profiles, 'converged': converged, 'rounds': rounds, 'status': status}
@@ -0,0 +1,63 @@
+"""Controls for long running solves: deadlines, cancellation and a time limit for a single sympy solve."""
+
+import multiprocessing
+import time
+
+
+class CancelToken(object):
+    """ Passed to a solver so another thread (or a progress callback) can stop it.
+        The solver checks the token between supports or nodes, so it stops at the next check."""
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class SolveTimeout(Exception):
+    """ Raised when a sympy solve takes longer than the time allowed."""
+    pass
+
+
+def stop_reason(deadline=None, cancel=None):
+    """Return 'cancelled' if the token has been cancelled, 'deadline' if the deadline (a time.time() value)
+       has passed, otherwise None."""
+    if cancel is not None and cancel.cancelled:
+        return 'cancelled'
+    if deadline is not None and time.time() >= deadline:
+        return 'deadline'
+    return None
+
+
+def _solve_worker(equations, symbols_list, conn):
+    from sympy.solvers import solve
+    try:
+        conn.send(('ok', solve(equations, symbols_list)))
+    except Exception as exc:
+        conn.send(('error', repr(exc)))
+    conn.close()
+
+
+def solve_with_timeout(equations, symbols_list, timeout):
+    """Call sympy solve in a separate process, killing it if it takes longer than timeout seconds.
+       Returns the result of solve, raises SolveTimeout if the time ran out and Exception if solve raised one."""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_solve_worker, args=(equations, symbols_list, sender))
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            process.terminate()
+            raise SolveTimeout('sympy solve took more than {} seconds'.format(timeout))
+        status, value = receiver.recv()
+    finally:
+        process.join()
+        receiver.close()
+    if status == 'error':
+        raise Exception(value)
+    return value
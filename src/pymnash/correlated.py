@@ -0,0 +1,59 @@
+"""Correlated equilibria as a linear program.
+   A correlated equilibrium is a probability distribution over action profiles (cells of the payoffs) such that
+   no player, told only his own action a by a mediator drawing from the distribution, gains by playing b instead.
+   For each player and pair of actions a != b that is one linear constraint on the cell probabilities, so unlike
+   nash equilibria they can be found in time polynomial in the size of the payoffs."""
+
+import numpy as np
+
+from .linprog import linprog
+
+
+def incentive_constraints(payoffs):
+    """Payoffs is an np.array of numbers, shape actions + (players,).
+       Returns an np.array with a row for each player and pair of his actions a != b, and a column per cell
+       (in np.ravel order). A distribution x over the cells is a correlated equilibrium when every row . x <= 0:
+       the row holds, for the cells where the player plays a, what he would gain by playing b instead."""
+    action_shape = payoffs.shape[:-1]
+    result = []
+    for player, num_actions in enumerate(action_shape):
+        utilities = np.moveaxis(payoffs[..., player], player, 0).reshape(num_actions, -1)
+        gains = utilities[None, :, :] - utilities[:, None, :] # [a, b, others], gain from playing b instead of a
+        rows = np.einsum('ac,abr->abcr', np.eye(num_actions), gains) # only the cells where he plays a
+        moved_shape = (num_actions,) + action_shape[:player] + action_shape[player + 1:]
+        rows = np.moveaxis(rows.reshape((num_actions * num_actions,) + moved_shape), 1, player + 1)
+        rows = rows.reshape(num_actions * num_actions, -1)
+        result.append(rows[~np.eye(num_actions, dtype=bool).ravel()])
+    return np.vstack(result)
+
+def objective_weights(payoffs, objective):
+    """The weight of each cell (in np.ravel order) to maximize. Objective is 'welfare' (the sum of the players'
+       payoffs), a player index (that player's payoff) or an np.array of weights with the shape of the actions."""
+    if isinstance(objective, str):
+        if objective != 'welfare':
+            raise Exception('Unknown objective {}, use welfare, a player or an array of weights'.format(objective))
+        return payoffs.sum(axis=-1).ravel()
+    if isinstance(objective, (int, np.integer)):
+        return payoffs[..., objective].ravel()
+    weights = np.asarray(objective, dtype=float)
+    if weights.shape != payoffs.shape[:-1]:
+        raise Exception('Objective weights have shape {}, not {}'.format(weights.shape, payoffs.shape[:-1]))
+    return weights.ravel()
+
+def solve(payoffs, objective='welfare', tolerance=1e-9):
+    """Find the correlated equilibrium maximizing objective (see objective_weights).
+       Returns a dict with the distribution (an np.array with the shape of the actions), the objective value
+       and the expected payoff of each player."""
+    payoffs = np.asarray(payoffs, dtype=float)
+    weights = objective_weights(payoffs, objective)
+    constraints = incentive_constraints(payoffs)
+    # scale so the tolerance means the same whatever the size of the payoffs
+    scale = np.abs(payoffs).max() or 1.0
+    result = linprog(-weights / scale, constraints / scale, np.zeros(len(constraints)),
+                     np.ones((1, len(weights))), np.ones(1), tolerance=tolerance)
+    if result['status'] != 'optimal':
+        raise Exception('Correlated equilibrium linear program failed: {}'.format(result['status']))
+    distribution = result['x'] / result['x'].sum()
+    cells = payoffs.reshape(-1, payoffs.shape[-1])
+    return {'distribution': distribution.reshape(payoffs.shape[:-1]), 'value': float(weights @ distribution),
+            'payoffs': distribution @ cells}
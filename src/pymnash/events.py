@@ -0,0 +1,80 @@
+"""Structured events emitted by the solvers, in place of verbose print calls.
+   A subscriber is any callable taking (event, fields), where event is a string such as 'support_tried' and
+   fields is a dict. When nothing is subscribed the solvers skip building events altogether, the cost is one
+   check of an empty list."""
+
+import json
+import logging
+
+
+class EventSource(object):
+    """ Mixin for classes which emit events to subscribers."""
+
+    _subscribers = () # replaced by a list on the first subscribe
+
+    def subscribe(self, callback):
+        """Call callback(event, fields) for every event from now on."""
+        if not self._subscribers:
+            self._subscribers = []
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _emit(self, event, **fields):
+        for callback in self._subscribers:
+            callback(event, fields)
+
+    @property
+    def verbose(self):
+        """True if events are being printed. Setting verbose subscribes or unsubscribes print_event."""
+        return print_event in self._subscribers
+
+    @verbose.setter
+    def verbose(self, value):
+        if value and not self.verbose:
+            self.subscribe(print_event)
+        elif not value:
+            self.unsubscribe(print_event)
+
+
+def print_event(event, fields):
+    """A subscriber which prints each event on one line."""
+    print(event, ' '.join('{}={}'.format(key, value) for key, value in fields.items()))
+
+
+def _json_default(obj):
+    """Make numpy and sympy values in event fields serializable."""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    return str(obj)
+
+
+class EventLog(object):
+    """ A subscriber which writes each event as a line of JSON, for tracing large runs to a file."""
+
+    def __init__(self, fh):
+        """Fh is a file name or an open file."""
+        if isinstance(fh, str):
+            fh = open(fh, 'w')
+        self.fh = fh
+
+    def __call__(self, event, fields):
+        record = {'event': event}
+        record.update(fields)
+        self.fh.write(json.dumps(record, default=_json_default) + '\n')
+
+    def close(self):
+        self.fh.close()
+
+
+def logging_subscriber(logger=None, level=logging.DEBUG):
+    """Return a subscriber which sends events to a logger (the pymnash logger by default).
+       Events are only formatted if the logger is enabled for the level."""
+    if logger is None:
+        logger = logging.getLogger('pymnash')
+    def log_event(event, fields):
+        if logger.isEnabledFor(level):
+            logger.log(level, '%s %s', event, fields)
+    return log_event
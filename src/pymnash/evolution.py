@@ -0,0 +1,86 @@
+"""Replicator dynamics for symmetric games, where the players are drawn from one population.
+   A population state is a mixed strategy x over the actions. The fitness of an action is its expected payoff
+   against opponents all playing x, and under the replicator dynamics actions fitter than the population average
+   grow: dx/dt = x * (fitness - x . fitness). Many populations are evolved at once as the rows of one np.array."""
+
+import numpy as np
+
+
+def fitness_path(payoffs, count):
+    """Work out the einsum contraction order for fitness once, for count states at a time."""
+    states = np.ones((count, payoffs.shape[0])) / payoffs.shape[0]
+    return np.einsum_path(*_fitness_operands(payoffs, states), optimize='greedy')[0]
+
+def _fitness_operands(payoffs, states):
+    """Payoffs is the payoffs of player 0, one axis per player. Z is the states axis."""
+    letters = [chr(ord('a') + player) for player in range(payoffs.ndim)]
+    subscripts = ''.join(letters) + ''.join(',Z' + letter for letter in letters[1:]) + '->Z' + letters[0]
+    return [subscripts, payoffs] + [states] * (payoffs.ndim - 1)
+
+def fitness(payoffs, states, path='greedy'):
+    """Return the fitness of each action for each state, an np.array the same shape as states (count, actions).
+       Payoffs is the payoffs of player 0 of a symmetric game, with one axis per player."""
+    return np.einsum(*_fitness_operands(payoffs, states), optimize=path)
+
+def _velocity(payoffs, states, path):
+    action_fitness = fitness(payoffs, states, path)
+    return states * (action_fitness - (states * action_fitness).sum(axis=1, keepdims=True))
+
+def replicator(payoffs, states, method='rk4', step=None, max_steps=10000, tolerance=1e-9):
+    """Evolve each row of states (an np.array of shape (count, actions)) under the replicator dynamics until it
+       stops moving (every component changes by less than tolerance per step for the discrete method, per unit of
+       time for rk4) or max_steps steps have been taken. Payoffs is the payoffs of player 0 of a symmetric game,
+       with one axis per player.
+       Method 'discrete' is the discrete time replicator x <- x * f / (x . f), with the payoffs shifted so every
+       fitness is at least 1, 'rk4' integrates the continuous dynamics with Runge-Kutta steps of length step
+       (by default 1 / the payoff spread). States which have stopped are not updated any more.
+       Returns a dict with the final states, converged (a boolean np.array) and steps (the steps each state
+       took)."""
+    if method not in ('discrete', 'rk4'):
+        raise Exception('Unknown method {}, use discrete or rk4'.format(method))
+    payoffs = np.asarray(payoffs, dtype=float)
+    states = np.array(states, dtype=float)
+    spread = np.ptp(payoffs) or 1.0
+    if step is None:
+        step = 1.0 / spread
+    shift = 1.0 - payoffs.min()
+    path = fitness_path(payoffs, len(states))
+    converged = np.zeros(len(states), dtype=bool)
+    steps = np.full(len(states), max_steps)
+    for count in range(max_steps):
+        active = np.flatnonzero(~converged)
+        if not len(active):
+            break
+        current = states[active]
+        if method == 'discrete':
+            action_fitness = fitness(payoffs, current, path) + shift
+            moved = current * action_fitness / (current * action_fitness).sum(axis=1, keepdims=True)
+            speed = np.abs(moved - current).max(axis=1)
+        else:
+            k1 = _velocity(payoffs, current, path)
+            k2 = _velocity(payoffs, current + step / 2 * k1, path)
+            k3 = _velocity(payoffs, current + step / 2 * k2, path)
+            k4 = _velocity(payoffs, current + step * k3, path)
+            moved = current + step / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+            moved = np.maximum(moved, 0)
+            moved /= moved.sum(axis=1, keepdims=True)
+            speed = np.abs(moved - current).max(axis=1) / step
+        states[active] = moved
+        stopped = active[speed < tolerance]
+        converged[stopped] = True
+        steps[stopped] = count + 1
+    return {'states': states, 'converged': converged, 'steps': steps}
+
+def cluster_states(states, tolerance=1e-3):
+    """Group states which are within tolerance of each other (in every component).
+       Returns an np.array of the cluster centers (the mean of their members) and an np.array with the cluster
+       index of each state."""
+    labels = np.full(len(states), -1)
+    centers = []
+    for index in range(len(states)):
+        if labels[index] >= 0:
+            continue
+        close = (labels < 0) & (np.abs(states - states[index]).max(axis=1) <= tolerance)
+        labels[close] = len(centers)
+        centers.append(states[close].mean(axis=0))
+    return np.array(centers), labels
@@ -1,33 +1,58 @@
 """A class for a multi-player normal form game"""
-import traceback
+import sys
 from copy import deepcopy
+from itertools import permutations
+from math import comb
+from random import Random
+from time import perf_counter
 import numpy as np
-from sympy import symbols
-from sympy.core import expr
-from sympy import preorder_traversal
-from sympy.solvers import solve
-#from sympy.core.expr import Expr
-from sympy.core import Number
-from sympy.core import Symbol
-from sympy.core import Expr
-from sympy.core.numbers import Float as FloatType
-from sympy.core.numbers import Rational as RationalType
+# sympy takes a long time to import, so it is only imported by the methods which solve symbolically.
 
+from .util import iterindices, itersupport, iter_subset_combos, is_pure, list_to_dict, \
+                  permute_support, contract_payoffs
+from .lazy_payoffs import LazyPayoffs
+from .profile import Profile
+from .stats import SolverStats
+from .events import EventSource
+from .control import SolveTimeout, stop_reason, solve_with_timeout
+from .numeric import indifference_coefficients, newton, newton_solutions, split
+from .small_games import solve_2xn
+from . import learning
+from . import k_uniform
+from . import correlated
+from . import qre
+from .best_response import potential_function, walk
+from .evolution import replicator, cluster_states
 
-from .util import iterprob, iterindices, itersupport, iter_subset_combos, is_pure, dict_to_list, list_to_dict
-
-class Game(object):
+class Game(EventSource):
     """ A class for a multi-player normal form game."""
 
 
-    def __init__(self, payoffs, player_labels = None, action_labels = None, verbose=False):
+    def __init__(self, payoffs, player_labels = None, action_labels = None, verbose=False, action_shape=None,
+                 stats=False, numeric=False):
         """Payoffs is an np.array of floats, giving payouts to all players.
-           If labels are omitted or incomplete we'll just fill them in with stringified ints."""
+           Payoffs may also be a LazyPayoffs object, or a function taking a tuple of actions and returning the
+           payoffs for all players, in which case action_shape (the number of actions for each player) is required
+           and payoffs are only calculated for the action profiles which are actually used.
+           If labels are omitted or incomplete we'll just fill them in with stringified ints.
+           If stats is True, solver counters and timers are collected in self.stats (see SolverStats).
+           Verbose prints the solver events, see subscribe to send them somewhere else.
+           If numeric is True, mixed equilibria are found with numpy instead of sympy and sympy is never imported
+           (see _numeric_indifference_probs for what that can solve).
+           Payoffs may also be an np.array of sympy expressions in some parameters (self.parameters), see
+           find_parametric_equilibria."""
         # For now I'm not using player/action labels.
         self.verbose = verbose
-        if type(payoffs) != np.ndarray:
+        self.stats = SolverStats() if stats else None
+        self.numeric = numeric
+        if callable(payoffs) and not isinstance(payoffs, LazyPayoffs):
+            if action_shape is None:
+                raise Exception('action_shape is required when payoffs is a function')
+            payoffs = LazyPayoffs(payoffs, action_shape)
+        if type(payoffs) != np.ndarray and not isinstance(payoffs, LazyPayoffs):
             raise Exception('Payoffs must be numpy array')
         self.payoffs = payoffs
+        self.parameters = _payoff_parameters(payoffs)
         self.player_count = self.num_players()
         player_count = self.player_count
         if player_labels is None:
@@ -41,6 +66,12 @@ class Game(object):
         self.set_action_labels(action_labels)
         self._wiggle = 0.000001
         self.dominated = [[] for ii in range(self.num_players())]
+        self._symmetries = None
+        self._symmetry_structure = None
+        self._potential = None # (the potential or None,) once potential has checked
+        self.solve_status = None # 'complete', 'deadline' or 'cancelled' once find_all_equilibria finishes
+        self.timed_out_supports = [] # supports skipped by the last find_all_equilibria because of support_timeout
+        self.tracking_failed = [] # previous equilibria the last track_equilibria couldn't follow
 
     def __repr__(self):
          return 'payoffs {}\nplayer_labels {}\naction_labels {}'.format(self.payoffs,
@@ -111,7 +142,12 @@ class Game(object):
         return val1 > val2 + self._wiggle
 
     def get_profile_payoffs(self, profile):
-        """Find all player payoffs given the strategy profile. Returns a list of floats."""
+        """Find all player payoffs given the strategy profile. Returns a list of floats.
+           Profile is a Profile or a list of lists of [action, probability] pairs."""
+        if isinstance(profile, Profile):
+            supports = profile.supports()
+            mixes = [profile[player][support] for player, support in enumerate(supports)]
+            return [float(payoff) for payoff in contract_payoffs(self._support_payoffs(supports), mixes)]
         payoffs = [0] * self.player_count
         for acombo in itersupport(profile):
             combo_actions = acombo[0]
@@ -121,9 +157,20 @@ class Game(object):
 
     def is_dominated(self, profile, profile_payoffs=None):
         """Check if there exists a pure strategy for at least one player which gives that player a payoff
-           higher than the specified profile."""
+           higher than the specified profile.
+           Profile is a Profile or a list of lists of [action, probability] pairs."""
         if profile_payoffs is None:
             profile_payoffs = self.get_profile_payoffs(profile)
+        if isinstance(profile, Profile):
+            for player in range(self.player_count):
+                utilities = self._action_utilities(player, profile)
+                if max(utilities) > profile_payoffs[player] + self._wiggle:
+                    if self._subscribers:
+                        self._emit('dominated', profile=profile.to_lists(), player=player,
+                                   action=int(np.argmax(utilities)), action_payoff=max(utilities),
+                                   profile_payoff=profile_payoffs[player])
+                    return True
+            return False
         for player in range(self.player_count):
             old_player_profile = profile[player]
             for anaction in range(self.payoffs.shape[player]):
@@ -134,16 +181,16 @@ class Game(object):
                     action_payoff +=  self.payoffs[(combo_actions)][player] * acombo[1]
                 profile[player] = old_player_profile
                 if action_payoff > profile_payoffs[player] + self._wiggle:
-                    if self.verbose:
-                        print("is_dominated profile {} is dominated for player {} by pure strategy {} ({}, {})".format(profile,
-                          player, anaction, action_payoff, profile_payoffs[player]))
+                    if self._subscribers:
+                        self._emit('dominated', profile=profile, player=player, action=anaction,
+                                   action_payoff=action_payoff, profile_payoff=profile_payoffs[player])
                     return True
         lol = 'nope'
         return False
 
     def is_nash(self, profile):
         """Check if the supplied strategy profile is a nash equilibrium.
-           Profile is a list of lists, each list is strategy profile for one player.
+           Profile is a list of lists, each list is strategy profile for one player, or a Profile.
            Returns a boolean."""
         # In order to be a valid nash equilibrium, each player must be indifferent
         # as to which action in his support he plays
@@ -151,41 +198,25 @@ class Game(object):
         # also, a player must not be able to do better by playing an action not in his suport.
         # of course, no probability can be negative and all probabilities must sum to 1.
         is_nash = True
-        shape = self.payoffs.shape
+        subscribers = self._subscribers
         for player, player_profile in enumerate(profile):
             prob_sum = 0
-            support_utility = None
-            nonsupport_utility = None
             for prob in player_profile:
                 if prob < 0:
                     raise Exception('negative probability')
                 prob_sum += prob
             if not self.eq(prob_sum, 1):
-                if self.verbose:
-                    print('prob_sum', prob_sum)
-                raise Exception('probabilities do not sum to 1')
-            others_profile = deepcopy(profile)
-            del others_profile[player]
+                raise Exception('probabilities for player {} sum to {}, not 1'.format(player, prob_sum))
+        for player, player_profile in enumerate(profile):
+            support_utility = None
+            nonsupport_utility = None
             # check the utility
+            utilities = self._action_utilities(player, profile)
             for jj, prob in enumerate(player_profile):
-                if self.verbose:
-                    print('player', player, 'others_profile', others_profile)
                 in_support = prob > 0
-                myslice = [slice(None)] * len(shape)
-                myslice[-1] = player
-                relevant_payoffs = self.payoffs[tuple(myslice)]
-                if self.verbose:
-                    print("all payoffs for player", player, relevant_payoffs)
-                myslice = [slice(None)] * (len(shape) - 1)
-                myslice[player] = jj
-                relevant_payoffs = relevant_payoffs[tuple(myslice)]
-                if self.verbose:
-                    print("payoffs for player", player, relevant_payoffs)
-                utility = 0
-                for (thetuple, theprob) in iterprob(others_profile):
-                    utility += relevant_payoffs[thetuple] * theprob
-                if self.verbose:
-                    print('player', player, 'action', jj, 'utility', utility, 'in_support', in_support)
+                utility = utilities[jj]
+                if subscribers:
+                    self._emit('action_utility', player=player, action=jj, utility=utility, in_support=in_support)
                 is_nash = True
                 if in_support:
                     if nonsupport_utility is not None and self.gt(nonsupport_utility, utility):
@@ -200,13 +231,53 @@ class Game(object):
                     if nonsupport_utility is None or utility > nonsupport_utility:
                         nonsupport_utility = utility
                 if not is_nash:
-                     if self.verbose:
-                        print('rejected utility', utility, 'support_utility', support_utility,
-                              'nonsupport_utility', nonsupport_utility)
+                     if subscribers:
+                        self._emit('nash_rejected', player=player, action=jj, utility=utility,
+                                   support_utility=support_utility, nonsupport_utility=nonsupport_utility)
                      return False
 
         return is_nash
 
+    def _action_utilities(self, player, profile):
+        """Find the expected payoff to player for each of his actions given the other players' strategies in
+           profile (a list of lists of probabilities, the player's own entry is ignored).
+           Only the payoffs for action profiles the other players play with nonzero probability are read.
+           Returns a list of floats."""
+        if isinstance(profile, Profile):
+            supports = profile.supports()
+            supports[player] = list(range(self.payoffs.shape[player]))
+            mixes = [profile[other][support] for other, support in enumerate(supports)]
+            block = self._support_payoffs(supports)[..., player]
+            return [float(utility) for utility in contract_payoffs(block, mixes, skip=player)]
+        others = [[[action, prob] for action, prob in enumerate(player_profile) if prob > 0]
+                  for player_profile in profile]
+        utilities = []
+        for action in range(self.payoffs.shape[player]):
+            others[player] = [[action, 1]]
+            utility = 0
+            for combo_actions, prob in itersupport(others):
+                utility += self.payoffs[combo_actions][player] * prob
+            utilities.append(utility)
+        return utilities
+
+    def _support_payoffs(self, supports):
+        """Return the payoffs restricted to the given actions of each player (a list of lists) as an np.array.
+           For lazy payoffs only those cells are calculated."""
+        if isinstance(self.payoffs, np.ndarray):
+            return self.payoffs[np.ix_(*supports)]
+        return self.payoffs[tuple(supports)]
+
+    def best_responses(self, profile):
+        """Find the best pure responses of each player to the other players' strategies.
+           Profile is a Profile or a list of lists of probabilities, as for is_nash.
+           Returns a list of lists of actions, one list per player."""
+        result = []
+        for player in range(self.player_count):
+            utilities = self._action_utilities(player, profile)
+            best = max(utilities)
+            result.append([action for action, utility in enumerate(utilities) if not self.gt(best, utility)])
+        return result
+
     def num_actions(self, player):
         """Return the number of availabel actions for the player with given index. Returns an int."""
         return self.payoffs.shape[player]
@@ -216,6 +287,162 @@ class Game(object):
         return len(self.payoffs.shape) - 1
 
 
+    def symmetries(self):
+        """Find the permutations of players which leave the payoffs unchanged.
+           A permutation is a tuple perm where player ii is moved to position perm[ii], it is a symmetry if
+           every player perm[ii] would get the same payoff in the permuted game as player ii does in the original.
+           Returns a list of tuples, the identity first. The result is cached.
+           For a game where all n players are interchangeable this list has n! elements,
+           find_all_equilibria does not need it in that case."""
+        if self._symmetries is not None:
+            return self._symmetries
+        classes, full = self._symmetry_classes()
+        identity = tuple(range(self.player_count))
+        result = [identity]
+        for perm in self._class_permutations(classes):
+            if perm == identity:
+                continue
+            if full or self._is_symmetry(perm):
+                result.append(perm)
+        self._symmetries = result
+        return result
+
+    def is_symmetric(self):
+        """Check whether the payoffs are unchanged by any permutation of the players. Returns a boolean."""
+        classes, full = self._symmetry_classes()
+        return full and len(classes) == 1
+
+    def _symmetry_classes(self):
+        """Group the players which might be swapped with each other into classes.
+           Returns a tuple (classes, full) where classes is a list of lists of players and full is True if every
+           permutation of players within their classes is a symmetry. The result is cached."""
+        if self._symmetry_structure is not None:
+            return self._symmetry_structure
+        num_players = self.player_count
+        identity = tuple(range(num_players))
+        # Players can only be swapped if they have the same number of actions and the same payoff values,
+        # so group players into classes first to avoid checking hopeless permutations.
+        classes = {}
+        for player in range(num_players):
+            values = self.payoffs[..., player]
+            if values.dtype == object:
+                # symbolic payoffs can't be ordered, but the same expressions have the same strings
+                key = (self.payoffs.shape[player], tuple(sorted(str(value) for value in values.flat)))
+            else:
+                key = (self.payoffs.shape[player], tuple(np.sort(values, axis=None)))
+            classes.setdefault(key, []).append(player)
+        classes = list(classes.values())
+        # If every pair in a class can be swapped the group is every permutation within the classes.
+        full = True
+        for aclass in classes:
+            for player in aclass[1:]:
+                swap = list(identity)
+                swap[aclass[0]] = player
+                swap[player] = aclass[0]
+                if not self._is_symmetry(swap):
+                    full = False
+                    break
+            if not full:
+                break
+        self._symmetry_structure = (classes, full)
+        return self._symmetry_structure
+
+    def _class_permutations(self, classes):
+        """Generate the player permutations which only move players within their class."""
+        for moves in _product_permutations(classes):
+            perm = [0] * self.player_count
+            for aclass, moved in zip(classes, moves):
+                for player, new_player in zip(aclass, moved):
+                    perm[player] = new_player
+            yield tuple(perm)
+
+    def _is_symmetry(self, perm):
+        """Check if moving each player ii to position perm[ii] leaves the payoffs unchanged."""
+        num_players = self.player_count
+        inverse = [0] * num_players
+        for player, new_player in enumerate(perm):
+            inverse[new_player] = player
+        for player in range(num_players):
+            if self.payoffs.shape[player] != self.payoffs.shape[perm[player]]:
+                return False
+        payoffs = np.asarray(self.payoffs)
+        permuted = np.transpose(payoffs, inverse + [num_players])[..., inverse]
+        if payoffs.dtype == object:
+            return bool(np.all(permuted == payoffs))
+        return bool(np.all(np.abs(permuted - payoffs) <= self._wiggle))
+
+    def _is_representative(self, support, symmetries):
+        """Check if support is the smallest member of its orbit under the symmetries.
+           If symmetries is None every permutation within the symmetry classes is a symmetry, so the
+           smallest member is the one with the supports sorted within each class."""
+        if symmetries is None:
+            classes, full = self._symmetry_classes()
+            for aclass in classes:
+                entries = [tuple(support[player]) for player in aclass]
+                if entries != sorted(entries):
+                    return False
+            return True
+        key = tuple(tuple(elm) for elm in support)
+        for perm in symmetries:
+            if tuple(tuple(elm) for elm in permute_support(support, perm)) < key:
+                return False
+        return True
+
+    def _orbit_perms(self, support, symmetries):
+        """Find one symmetry for each distinct support the given support can be mapped to. Returns a list.
+           If symmetries is None every permutation within the symmetry classes is a symmetry, and the
+           distinct supports are the distinct arrangements of the supports within each class."""
+        if symmetries is None:
+            classes, full = self._symmetry_classes()
+            return list(self._arrangement_perms(support, classes))
+        seen = set()
+        result = []
+        for perm in symmetries:
+            key = tuple(tuple(elm) for elm in permute_support(support, perm))
+            if key not in seen:
+                seen.add(key)
+                result.append(perm)
+        return result
+
+    def _arrangement_perms(self, support, classes):
+        """Generate one permutation for each distinct arrangement of the supports within each class,
+           starting with the identity."""
+        choices = []
+        for aclass in classes:
+            entries = [tuple(support[player]) for player in aclass]
+            choices.append(list(_multiset_permutations(entries)))
+        for arrangement in _product_lists(choices):
+            perm = [0] * self.player_count
+            for aclass, entries in zip(classes, arrangement):
+                # send each player to a position in his class which needs his support
+                unused = list(aclass)
+                for position, entry in zip(aclass, entries):
+                    for player in unused:
+                        if tuple(support[player]) == entry:
+                            perm[player] = position
+                            unused.remove(player)
+                            break
+            yield tuple(perm)
+
+    def _permute_solution(self, solution, perm):
+        """Move the strategy of player ii of solution (a list of dicts) to player perm[ii].
+           Symbolic probabilities are renamed to match their new player."""
+        if perm == tuple(range(self.player_count)):
+            return solution
+        result = permute_support(solution, perm)
+        if not any(_is_sympy(prob, 'Expr') for player_actions in solution for prob in player_actions.values()):
+            return result
+        from sympy import symbols
+        renames = {}
+        for player, player_actions in enumerate(solution):
+            for action in player_actions:
+                name = 'prob_{}_{}'.format(player, action)
+                renames[symbols(name)] = symbols('prob_{}_{}'.format(perm[player], action))
+        for ii, player_actions in enumerate(result):
+            result[ii] = {action: prob.xreplace(renames) if _is_sympy(prob, 'Expr') else prob
+                          for action, prob in player_actions.items()}
+        return result
+
     def find_pure(self, simple=True):
         """Find any pure nash equilibria for this game. Returns a list of lists, one entry per equilibrium found.
            Inner list is the actions for each player."""
@@ -229,8 +456,8 @@ class Game(object):
                  profile[player] = [0] * self.num_actions(player)
                  profile[player][action] = 1
              is_nash = self.is_nash(profile)
-             if self.verbose:
-                 print('profile', profile, 'is_nash', is_nash)
+             if self._subscribers:
+                 self._emit('pure_checked', actions=indices, is_nash=is_nash)
              if is_nash:
                  eq.append(indices)
         if simple:
@@ -310,16 +537,13 @@ class Game(object):
                             ut1 = action1_payoffs[indices]
                             if not self.gt(ut0, ut1):
                                 adominated = False
-                                if self.verbose:
-                                    pass
-                                    # print('player', player, 'action0', action0, 'action1', action1, 'u0', ut0, 'u1', ut1)
                                 break
                         if adominated and action1 not in dominated[player]:
                              dominated[player].append(action1)
                              progress = True
                              real_progess = True
-                             if self.verbose:
-                                  print('player', player, 'action', action1, 'dominated by', action0, 'appending1')
+                             if self._subscribers:
+                                 self._emit('strategy_dominated', player=player, action=action1, by=[action0])
         return real_progress
 
     def iesds2(self):
@@ -411,16 +635,25 @@ class Game(object):
                         max_p = p
                     if min_p is not None and max_p is not None and min_p > max_p:
                         return False
-        if self.verbose:
-            print("player", player, "strategy", strat_a, "dominated by ", strat_b, strat_c, min_p, max_p)
+        if self._subscribers:
+            self._emit('strategy_dominated', player=player, action=strat_a, by=[strat_b, strat_c],
+                       min_p=min_p, max_p=max_p)
         return True
 
-    def _get_indifference_probs(self, support):
+    def _get_indifference_probs(self, support, timeout=None):
         """Find the combinations of probabilities such that each player is indifferent to which action in his
            own support which he plays given the probabilities of the other players.
            Support is a list of lists, players and actions. Each player could have any number of actions,
            the number of possible actions  will vary by player.
+           If timeout is given, sympy runs in a separate process which is killed after that many seconds,
+           raising SolveTimeout.
            Returns a list of dicts."""
+        from sympy import symbols, solve, sympify, Add, Mul
+        from sympy.core.numbers import Float as FloatType
+        from sympy.core.numbers import Rational as RationalType
+        stats = self.stats
+        if stats is not None:
+            start = perf_counter()
         support_symbols = [] # list of lists. Value is a tuple (player_action (int), symbol)
         symbols_list = [] # put all symbols in one list for solver
         for player in range(len(support)):
@@ -441,33 +674,48 @@ class Game(object):
                 eq += action[1]
             psums.append(eq)
         #print(repr(psums))
+        # each indifference equation is a multilinear polynomial in the other players' probabilities, build it
+        # from its coefficients rather than multiplying out every cell of the support
+        offsets = np.concatenate([[0], np.cumsum([len(actions) for actions in support])]).astype(int)
+        coefficients = indifference_coefficients(self._support_payoffs(support))
         indiff_equations = []
-        for player in  range(len(support_symbols)):
-            if len(support_symbols[player]) == 1: # player is sticking with 1 strategy, no indifference for him
-                continue
-            ppayoffs = [] # each element is the expected payoff to the chosen player for the chosen action
-            old_ss = support_symbols[player]
-            for player_action in support[player]:
-                support_symbols[player] = [(player_action, 1)]
-                apayoff = 0
-                for acombo in itersupport(support_symbols):
-                    combo_actions = acombo[0]
-                    apayoff += self.payoffs[(combo_actions)][player] * acombo[1]
-                ppayoffs.append(apayoff)
-            for payoff_index in range(1, len(ppayoffs)):
-                an_equality = ppayoffs[0] - ppayoffs[payoff_index]
-                indiff_equations.append(an_equality)
-            support_symbols[player] = old_ss
+        for player, player_coefficients in enumerate(coefficients):
+            others = [other for other in range(len(support)) if other != player]
+            for equation_coefficients in player_coefficients:
+                terms = []
+                for index in zip(*np.nonzero(equation_coefficients)):
+                    term_symbols = [symbols_list[offsets[other] + action] for other, action in zip(others, index)]
+                    terms.append(Mul(sympify(equation_coefficients[index]), *term_symbols))
+                indiff_equations.append(Add(*terms))
         all_equations = psums + indiff_equations
+        if stats is not None:
+            stats.add_time('build_equations', start)
+            stats.count('sympy_calls')
+            start = perf_counter()
         try:
-             initial_solutions = solve(all_equations, symbols_list)
+             if timeout is None:
+                 initial_solutions = solve(all_equations, symbols_list)
+             else:
+                 initial_solutions = solve_with_timeout(all_equations, symbols_list, timeout)
+        except SolveTimeout:
+             if stats is not None:
+                 stats.add_time('sympy_solve', start)
+                 stats.count('sympy_timeouts')
+             raise
         except Exception:
              # This means there are no solutions with the given support
              #print("sympy threw an exception, here the equations ans symbols", all_equations, symbols_list)
+             if stats is not None:
+                 stats.add_time('sympy_solve', start)
+                 stats.count('sympy_failures')
              return []
+        if stats is not None:
+            stats.add_time('sympy_solve', start)
         if not initial_solutions:
-            if self.verbose:
-                print('_get_indifference_probs support {} no indifference probs (no solutions)'.format(support))
+            if stats is not None:
+                stats.count('no_solutions')
+            if self._subscribers:
+                self._emit('no_solutions', support=support)
             return []
         if type(initial_solutions) == dict:
             support_result = self._sympy_dict_to_profile(initial_solutions)
@@ -476,8 +724,10 @@ class Game(object):
                     #print('type', type(val))
                     if type(val) in (FloatType, RationalType):
                         if float(val) > 1 or float(val) <= 0:
-                            if self.verbose:
-                                 print('_get_indifference_probs support {} no indifference probs (oob)'.format(support))
+                            if stats is not None:
+                                stats.count('out_of_bounds')
+                            if self._subscribers:
+                                self._emit('out_of_bounds', support=support, solution=aprofile)
                             return []
             #print(" a dict?? WFTT???")
             #print([initial_solutions])
@@ -495,6 +745,11 @@ class Game(object):
 
                 except Exception:
                     pass # can't compare symbol with number, carry on
+            if not ok:
+                if stats is not None:
+                    stats.count('out_of_bounds')
+                if self._subscribers:
+                    self._emit('out_of_bounds', support=support, solution=list(asolution))
             if ok:
                 sd = {}
                 for ii, elm in enumerate(symbols_list):
@@ -508,6 +763,41 @@ class Game(object):
         #    print(asolution)
         return real_solutions
 
+    def _numeric_indifference_probs(self, support):
+        """Numeric version of _get_indifference_probs which doesn't use sympy.
+           For two player games each player's probabilities make the other player indifferent between the actions
+           in his support, which is a linear system solved with numpy. With more players the equations are
+           polynomial and are solved by Newton's method from several starting points.
+           If the support has a continuum of solutions only one of them is found.
+           Returns a list of dicts, like _get_indifference_probs, with float probabilities."""
+        block = self._support_payoffs(support)
+        if self.player_count != 2:
+            solutions = newton_solutions(indifference_coefficients(block), [len(actions) for actions in support],
+                                         wiggle=self._wiggle)
+            return [[{action: float(prob) for action, prob in zip(actions, probs)}
+                     for actions, probs in zip(support, solution)] for solution in solutions]
+        result = [{} for ii in range(self.player_count)]
+        for player in range(2):
+            other = 1 - player
+            # payoffs to the other player for each of his actions (rows) against this player's actions (columns)
+            payoffs = block[..., other] if other == 0 else block[..., other].T
+            rows, cols = payoffs.shape
+            # unknowns: this player's probabilities and the other player's payoff
+            matrix = np.zeros((rows + 1, cols + 1))
+            matrix[:rows, :cols] = payoffs
+            matrix[:rows, cols] = -1
+            matrix[rows, :cols] = 1
+            target = np.zeros(rows + 1)
+            target[rows] = 1
+            solution = np.linalg.lstsq(matrix, target, rcond=None)[0]
+            if not np.allclose(matrix @ solution, target, atol=self._wiggle):
+                return []
+            probs = solution[:cols]
+            if probs.min() <= self._wiggle or probs.max() > 1 + self._wiggle:
+                return []
+            result[player] = {action: float(prob) for action, prob in zip(support[player], probs)}
+        return [result]
+
     def _sympy_dict_to_profile(self, pd):
         """Given a sympy dictionary indicating solutions to indifference equations, return a support structure."""
         #The probabilities in the profile here might be a number or an expression
@@ -522,10 +812,11 @@ class Game(object):
         # The profile also must include self-referntial values for symbolic probabilities e.g
         # if sympy says player 0 has an action profile of 0: 1 - p_0_1 the we must also include in his
         # action dict a value 1: p_0_1
+        from sympy import preorder_traversal, Expr, Symbol
         for elm in pd.values():
             if isinstance(elm, Expr):
                 for arg in  preorder_traversal(elm):
-                    if isinstance(arg, Symbol):
+                    if isinstance(arg, Symbol) and str(arg).startswith('prob_'): # not a payoff parameter
                         name = str(arg)
                         pieces = name.split('_')
                         player = int(pieces[1])
@@ -543,9 +834,9 @@ class Game(object):
             even = 1.0 / len(player_actions)
             for action in player_actions:
                 action_prob = player_actions[action]
-                if isinstance(action_prob, Number):
+                if _is_sympy(action_prob, 'Number'):
                     profile_result[player_index][action] = float(action_prob)
-                elif isinstance(action_prob, Expr):
+                elif _is_sympy(action_prob, 'Expr'):
                     profile_result[player_index] = {anaction: even for anaction in player_actions}
                     continue
                 else:
@@ -553,52 +844,697 @@ class Game(object):
         return profile_result
 
 
-    def find_all_equilibria(self):
+    def find_all_equilibria(self, use_symmetry=None, deadline=None, progress=None, cancel=None,
+                            support_timeout=None, closed_form=True):
         """Attempt to find all nash equilibria for a game. Yields a list of dicts, keys are symbols,
-           values are probabilities (numbers or symbols)."""
+           values are probabilities (numbers or symbols).
+           If use_symmetry is True, only one support out of each set of supports which are the same up to a
+           symmetry of the players (see symmetries) is solved, and the others are found by permuting the results.
+           Finding the symmetries reads every payoff, so by default (None) they are only used for payoffs in an
+           np.array, not for lazy payoffs.
+           The search stops early once deadline (a time.time() value) has passed or cancel (a CancelToken) has
+           been cancelled. Progress, if given, is called as progress(fraction_done, equilibria_found) after
+           every support. Supports whose sympy solve takes longer than support_timeout seconds are skipped and
+           listed in self.timed_out_supports.
+           Equilibria are yielded as they are found, so the ones found before stopping are always available.
+           When the generator finishes self.solve_status is 'complete', 'deadline' or 'cancelled'.
+           Two player games where a player has two actions are solved in closed form (see solve_2xn) unless they
+           are degenerate or closed_form is False, the probabilities are then floats.
+           Games with payoff parameters can't be solved this way, as whether a solution is an equilibrium depends
+           on the parameters, see subs_parameters and find_parametric_equilibria."""
+        if self.parameters:
+            raise Exception('The payoffs depend on parameters {}, use subs_parameters to give them values or '
+                            'find_parametric_equilibria to solve over a grid of values'.format(self.parameters))
         action_shape = self.payoffs.shape[:-1]
+        if closed_form and self._closed_form_applies():
+            equilibria = solve_2xn(self.payoffs, self._wiggle)
+            if equilibria is not None:
+                if self.stats is not None:
+                    self.stats.count('closed_form_solves')
+                    self.stats.count('solutions_found', len(equilibria))
+                if self._subscribers:
+                    self._emit('closed_form_solved', equilibria=equilibria)
+                for equilibrium in equilibria:
+                    yield self._sub_action_labels(equilibrium)
+                if progress is not None:
+                    progress(1.0, len(equilibria))
+                self.solve_status = 'complete'
+                return
         possible_actions = [list(range(player_actions)) for player_actions in action_shape]
+        symmetries = [tuple(range(self.player_count))]
+        if self._use_symmetry(use_symmetry):
+            classes, full = self._symmetry_classes()
+            if full:
+                symmetries = None # every permutation within the classes, no need to list them
+            else:
+                symmetries = self.symmetries()
         #print(possible_actions)
         # we should first eliminate dominated strategies. we will skip that step for now
+        stats = self.stats
+        self.solve_status = 'running'
+        self.timed_out_supports = []
+        total = _count_supports(action_shape)
+        done = 0
+        found = 0
         for acombo in iter_subset_combos(possible_actions):
-           if is_pure(acombo):
-               # print(acombo)
-               profile = [[[player_action[0], 1]] for player_action in acombo]
-               if not self.is_dominated(profile):
-                    profile_dict = [list_to_dict(player_profile) for player_profile in profile]
-                    yield self._sub_action_labels(profile_dict)
-           else:
-               #print("checking combo", acombo)
-               combo_solutions = self._get_indifference_probs(acombo)
-               for asol in combo_solutions:
-                   # print('asol', asol)
-                   #listy = [dict_to_list(psol) for psol in asol]
-                   #print('psol', psol)
-                   carnate = self.carnate_profile(asol)
-                   listy = [dict_to_list(elm) for elm in carnate]
-                   if not self.is_dominated(listy):
-                       yield self._sub_action_labels(asol)
-
-    def find_support_equilibria(self, support):
-        """Similar to above, but just find the nash equilibria with the given support"""
+            reason = stop_reason(deadline, cancel)
+            if reason is not None:
+                self.solve_status = reason
+                return
+            done += 1
+            if stats is not None:
+                stats.count('supports_enumerated')
+            if symmetries is None or len(symmetries) > 1:
+                if not self._is_representative(acombo, symmetries):
+                    if stats is not None:
+                        stats.count('supports_pruned')
+                    continue
+            if self._subscribers:
+                self._emit('support_tried', support=acombo)
+            try:
+                combo_solutions = self.find_support_equilibria(acombo, timeout=support_timeout)
+            except SolveTimeout:
+                self.timed_out_supports.append(acombo)
+                if self._subscribers:
+                    self._emit('support_timeout', support=acombo)
+                combo_solutions = []
+            if combo_solutions:
+                if self._subscribers:
+                    for asol in combo_solutions:
+                        self._emit('solution_found', support=acombo, solution=asol)
+                for perm in self._orbit_perms(acombo, symmetries):
+                    for asol in combo_solutions:
+                        found += 1
+                        yield self._sub_action_labels(self._permute_solution(asol, perm))
+            if progress is not None:
+                progress(done / total, found)
+        self.solve_status = 'complete'
+
+    def _use_symmetry(self, use_symmetry):
+        """Whether to use symmetries, None meaning only if the payoffs are an np.array (finding them reads every
+           payoff, which would defeat lazy payoffs)."""
+        if use_symmetry is None:
+            return isinstance(self.payoffs, np.ndarray)
+        return use_symmetry
+
+    def _closed_form_applies(self):
+        """Whether the game is a 2 x N game of numbers, which solve_2xn can solve."""
+        return (self.player_count == 2 and isinstance(self.payoffs, np.ndarray) and self.payoffs.dtype != object
+                and 2 in self.payoffs.shape[:-1])
+
+    async def afind_all_equilibria(self, solver=None, **kwargs):
+        """Async version of find_all_equilibria, returns a list of equilibria. The solve runs in the worker pool of
+           solver (an AsyncSolver, by default one shared by all games) so the event loop isn't blocked."""
+        if solver is None:
+            from .async_solve import default_solver
+            solver = default_solver()
+        return await solver.find_all_equilibria(self, **kwargs)
+
+    def aiter_equilibria(self, solver=None, **kwargs):
+        """Async iterator over the equilibria found by find_all_equilibria, see afind_all_equilibria."""
+        if solver is None:
+            from .async_solve import default_solver
+            solver = default_solver()
+        return solver.iter_equilibria(self, **kwargs)
+
+    def find_support_equilibria(self, support, timeout=None):
+        """Similar to above, but just find the nash equilibria with the given support.
+           Raises SolveTimeout if sympy takes longer than timeout seconds."""
         result = []
+        stats = self.stats
+        if stats is not None:
+            stats.count('supports_solved')
         if is_pure(support):
            # print(acombo)
             profile = [[[player_action[0], 1]] for player_action in support]
-            if not self.is_dominated(profile):
+            if not self._timed_is_dominated(Profile.from_pairs(profile, self.payoffs.shape[:-1])):
                 profile_dict = [list_to_dict(player_profile) for player_profile in profile]
                 result.append(profile_dict)
         else:
-           ind = self._get_indifference_probs(support)
-           if self.verbose:
-               print('indifference probs', indifference_probs)
+           if self.numeric:
+               ind = self._numeric_indifference_probs(support)
+           else:
+               ind = self._get_indifference_probs(support, timeout)
+           if self._subscribers:
+               self._emit('indifference_probs', support=support, solutions=ind)
            for asol in ind:
-               carnate = self._carnate_profile(asol)
-               listy = [dict_to_list(elm) for elm in carnate]
-               if not self.is_dominated(listy):
+               if stats is not None:
+                   start = perf_counter()
+               carnate = self.carnate_profile(asol)
+               if stats is not None:
+                   stats.add_time('carnate_profile', start)
+               if not self._timed_is_dominated(Profile.from_dicts(carnate, self.payoffs.shape[:-1])):
                    result.append(asol)
+        if stats is not None:
+            stats.count('solutions_found', len(result))
+        return result
+
+    def _timed_is_dominated(self, profile):
+        """is_dominated, recording the time and any rejection in self.stats."""
+        stats = self.stats
+        if stats is None:
+            return self.is_dominated(profile)
+        start = perf_counter()
+        dominated = self.is_dominated(profile)
+        stats.add_time('is_dominated', start)
+        if dominated:
+            stats.count('dominance_rejections')
+        return dominated
+
+    def find_approximate_equilibrium(self, method='regret_matching', iterations=1000, restarts=1, epsilon=None,
+                                     seed=None, **kwargs):
+        """Find an approximate nash equilibrium with an iterative method, fictitious_play, regret_matching or
+           hedge, for games too big for find_all_equilibria. Restarts runs that many copies from different random
+           strategies side by side. The other arguments are passed on to pymnash.learning.solve.
+           Returns the dict from solve, with the best restart's profile added as equilibrium (a list of dicts of
+           float probabilities like find_all_equilibria's, leaving out actions played less than wiggle) and its
+           epsilon, the most any player could gain by changing his strategy."""
+        if isinstance(self.payoffs, np.ndarray):
+            payoffs = self.payoffs
+        else:
+            payoffs = self._support_payoffs([list(range(size)) for size in self.payoffs.shape[:-1]])
+        result = learning.solve(payoffs, method, iterations, restarts, epsilon, seed=seed, **kwargs)
+        equilibrium = []
+        for mix in result['mixes']:
+            mix = np.where(mix[result['best']] > self._wiggle, mix[result['best']], 0.0)
+            mix = mix / mix.sum()
+            equilibrium.append({action: float(prob) for action, prob in enumerate(mix) if prob > 0})
+        result['equilibrium'] = self._sub_action_labels(equilibrium)
+        result['epsilon'] = float(result['epsilons'][result['best']])
+        if self._subscribers:
+            self._emit('approximate_equilibrium', method=method, iterations=result['iterations'],
+                       status=result['status'], epsilon=result['epsilon'])
+        return result
+
+    def find_k_uniform_equilibrium(self, k=2, **kwargs):
+        """Find the k-uniform profile (every probability a multiple of 1/k) with the least epsilon, by searching
+           them all in batches. This gives an epsilon-equilibrium of games too big for find_all_equilibria, and
+           the exact best epsilon over the grid unless the search is cut short. The other arguments are passed on
+           to pymnash.k_uniform.search.
+           Returns the dict from search, with the profile added as equilibrium (a list of dicts of float
+           probabilities like find_all_equilibria's)."""
+        if isinstance(self.payoffs, np.ndarray):
+            payoffs = self.payoffs
+        else:
+            payoffs = self._support_payoffs([list(range(size)) for size in self.payoffs.shape[:-1]])
+        result = k_uniform.search(payoffs, k, **kwargs)
+        equilibrium = None
+        if result['mixes'] is not None:
+            equilibrium = self._sub_action_labels([{action: float(prob) for action, prob in enumerate(mix) if prob > 0}
+                                                   for mix in result['mixes']])
+        result['equilibrium'] = equilibrium
+        if self._subscribers:
+            self._emit('k_uniform_equilibrium', k=k, evaluated=result['evaluated'], pruned=result['pruned'],
+                       status=result['status'], epsilon=result['epsilon'])
+        return result
+
+    def find_double_oracle_equilibria(self, initial=None, symmetric=False, max_iterations=100, deadline=None,
+                                      cancel=None):
+        """Find equilibria of games with many actions whose equilibria only use a few of them, by the double
+           oracle method. The game restricted to a few actions per player (initial, a list of lists, by default
+           action 0 for everyone) is solved with find_all_equilibria, and each player's best response to each of
+           its equilibria is found over all his actions. Best responses which do better than the equilibrium are added
+           and the restricted game solved again, until some equilibrium can't be improved on by any player.
+           If symmetric is True (the game must be symmetric) every player gets the same actions, so the
+           restricted games are symmetric too.
+           Only the payoffs of the restricted games and of best responses to their equilibria are read, which
+           matters for lazy payoffs.
+           Returns a dict with the equilibria of the full game found (a list of lists of dicts of float
+           probabilities, like find_all_equilibria's), the actions of the last restricted game, the iterations
+           and the status ('complete', 'max_iterations', 'deadline', 'cancelled' or 'stuck' if no new actions
+           were found, which can happen when carnate_profile picks a point of a continuum of restricted
+           equilibria which isn't an equilibrium)."""
+        action_shape = self.payoffs.shape[:-1]
+        if initial is None:
+            initial = [[0] for player in range(self.player_count)]
+        actions = [sorted(player_actions) for player_actions in initial]
+        equilibria = []
+        status = 'max_iterations'
+        iteration = 0
+        while iteration < max_iterations:
+            reason = stop_reason(deadline, cancel)
+            if reason is not None:
+                status = reason
+                break
+            iteration += 1
+            restricted = Game(self._support_payoffs(actions), action_labels=actions, numeric=self.numeric)
+            added = [set() for player in range(self.player_count)]
+            for equilibrium in restricted.find_all_equilibria(deadline=deadline, cancel=cancel):
+                equilibrium = restricted.carnate_profile(equilibrium)
+                responses = self._improving_responses(equilibrium, action_shape)
+                if all(response is None for response in responses):
+                    equilibria.append(self._sub_action_labels(equilibrium))
+                for player, response in enumerate(responses):
+                    if response is not None:
+                        added[player].add(response)
+            if self._subscribers:
+                self._emit('double_oracle_iteration', iteration=iteration, actions=actions,
+                           found=len(equilibria), added=[sorted(player_added) for player_added in added])
+            if restricted.solve_status != 'complete':
+                status = restricted.solve_status
+                break
+            if equilibria:
+                status = 'complete'
+                break
+            if symmetric:
+                added = [set().union(*added)] * self.player_count
+            grown = [sorted(set(player_actions) | player_added) for player_actions, player_added in zip(actions, added)]
+            if grown == actions:
+                status = 'stuck'
+                break
+            actions = grown
+        return {'equilibria': equilibria, 'actions': actions, 'iterations': iteration, 'status': status}
+
+    def _improving_responses(self, equilibrium, action_shape):
+        """Return a list with each player's best response to the other players in equilibrium, a list of dicts
+           of float probabilities, if it does better than his equilibrium payoff, otherwise None. Of several
+           best responses the first is taken, adding them all can bring in most of the actions at once."""
+        profile = Profile.from_dicts(equilibrium, action_shape)
+        result = []
+        for player, player_profile in enumerate(equilibrium):
+            utilities = self._action_utilities(player, profile)
+            value = sum(prob * utilities[action] for action, prob in player_profile.items())
+            best = int(np.argmax(utilities))
+            result.append(best if self.gt(utilities[best], value) else None)
+        return result
+
+    def find_correlated_equilibrium(self, objective='welfare'):
+        """Find a correlated equilibrium, a distribution over action profiles such that no player told his own
+           action by a mediator drawing from it gains by playing another. Every nash equilibrium is one, so the
+           best correlated equilibrium bounds what the players can get in any nash equilibrium. It is found by
+           linear programming (see pymnash.correlated), maximizing objective: 'welfare' (the total payoff), a
+           player index or an np.array of weights for each action profile.
+           Returns a dict with the distribution (a dict of action profile tuple: float probability, leaving out
+           profiles with probability under wiggle), the objective value and each player's expected payoff."""
+        if isinstance(self.payoffs, np.ndarray):
+            payoffs = self.payoffs
+        else:
+            payoffs = self._support_payoffs([list(range(size)) for size in self.payoffs.shape[:-1]])
+        result = correlated.solve(payoffs, objective)
+        probs = result['distribution']
+        cells = np.argwhere(probs > self._wiggle)
+        total = probs[tuple(cells.T)].sum()
+        result['distribution'] = {tuple(self.action_labels[player][action] for player, action in enumerate(cell)):
+                                  float(probs[tuple(cell)] / total) for cell in cells}
+        result['payoffs'] = [float(payoff) for payoff in result['payoffs']]
+        if self._subscribers:
+            self._emit('correlated_equilibrium', objective=objective, value=result['value'],
+                       profiles=len(cells))
+        return result
+
+    def find_quantal_response_equilibrium(self, refine=True, support_tolerance=1e-3, **kwargs):
+        """Follow the logit quantal response equilibrium curve from uniform play (lambda = 0) towards a nash
+           equilibrium, see pymnash.qre.trace, to which the other arguments are passed. Each step is a few tensor
+           contractions of the payoffs, so this works for games where find_all_equilibria is too slow.
+           If refine is True the actions played with probability over support_tolerance at the end of the curve
+           are taken as the support, and Newton's method on it (or on a support with one action more or less,
+           as in track_equilibria) gives an exact equilibrium.
+           Returns the dict from trace, with equilibrium (a list of dicts of float probabilities like
+           find_all_equilibria's, the refined equilibrium or else the end of the curve) and refined added."""
+        if isinstance(self.payoffs, np.ndarray):
+            payoffs = self.payoffs
+        else:
+            payoffs = self._support_payoffs([list(range(size)) for size in self.payoffs.shape[:-1]])
+        result = qre.trace(payoffs, **kwargs)
+        profile = []
+        for mix in result['mixes']:
+            mix = np.where(mix > support_tolerance, mix, 0.0)
+            mix = mix / mix.sum()
+            profile.append({action: float(prob) for action, prob in enumerate(mix) if prob > 0})
+        refined = self._track_equilibrium(profile) if refine else None
+        result['refined'] = refined is not None
+        result['equilibrium'] = self._sub_action_labels(refined if refined is not None else profile)
+        if self._subscribers:
+            self._emit('quantal_response_equilibrium', steps=result['steps'], status=result['status'],
+                       lam=result['lambda'], epsilon=result['epsilon'], refined=result['refined'])
+        return result
+
+    def potential(self):
+        """Check whether this is an exact potential game, see pymnash.best_response.potential_function.
+           Returns an np.array with the potential of each action profile, or None if it isn't one. This reads
+           every payoff. The result is cached."""
+        if self._potential is None:
+            payoffs = self._support_payoffs([list(range(size)) for size in self.payoffs.shape[:-1]])
+            self._potential = (potential_function(payoffs, self._wiggle),)
+        return self._potential[0]
+
+    def find_pure_best_response(self, walkers=100, max_rounds=100, check_potential=None, seed=None, deadline=None,
+                                cancel=None):
+        """Look for pure nash equilibria with best response dynamics from walkers random pure profiles at once,
+           see pymnash.best_response.walk. Only the payoffs of each moving player's actions at the walkers'
+           profiles are read, so unlike find_pure this works on huge (lazy) games. It finds some pure equilibria,
+           not necessarily all, and in games which aren't potential games walkers can cycle without converging.
+           If check_potential is True (the default for payoffs in an np.array, as it reads every payoff) potential
+           is checked first. In a potential game every walker converges, and the first walker starts from the
+           profile with the highest potential, which is already an equilibrium.
+           Returns a dict with the equilibria (a list of tuples of actions, like find_pure's), the number of walkers
+           which converged, the rounds done, potential (True, False or None if not checked) and the status
+           ('complete', 'max_rounds', 'deadline' or 'cancelled')."""
+        action_shape = self.payoffs.shape[:-1]
+        if check_potential is None:
+            check_potential = isinstance(self.payoffs, np.ndarray)
+        potential = self.potential() if check_potential else None
+        rng = np.random.default_rng(seed)
+        starts = np.column_stack([rng.integers(size, size=walkers) for size in action_shape])
+        if potential is not None:
+            starts[0] = np.unravel_index(np.argmax(potential), action_shape)
+        if isinstance(self.payoffs, np.ndarray):
+            lookup = lambda cells: self.payoffs[tuple(cells.T)]
+        else:
+            lookup = self.payoffs.cells
+        result = walk(lookup, action_shape, starts, max_rounds, self._wiggle, deadline, cancel)
+        equilibria = []
+        for profile in result['profiles'][result['converged']]:
+            profile = tuple(int(action) for action in profile)
+            if profile not in equilibria:
+                equilibria.append(profile)
+        found = {'equilibria': equilibria, 'converged': int(result['converged'].sum()), 'rounds': result['rounds'],
+                 'potential': None if not check_potential else potential is not None, 'status': result['status']}
+        if self._subscribers:
+            self._emit('best_response_walk', walkers=walkers, converged=found['converged'], rounds=found['rounds'],
+                       equilibria=len(equilibria), potential=found['potential'])
+        return found
+
+    def find_evolutionary_states(self, samples=1000, method='rk4', step=None, max_steps=10000, tolerance=1e-9,
+                                 cluster_tolerance=1e-3, seed=None):
+        """For a symmetric game, treat the players as drawn from one population playing a mixed strategy and
+           evolve samples random starting populations at once with the replicator dynamics (see
+           pymnash.evolution.replicator for method, step, max_steps and tolerance). The final states are grouped
+           when within cluster_tolerance of each other.
+           Returns a list of dicts, one per group, the biggest basin of attraction first: state (a dict of
+           action: probability, leaving out probabilities under cluster_tolerance), basin (the fraction of the
+           starting populations which ended there), converged (the fraction of those which stopped moving) and
+           is_nash (whether everyone playing state is a nash equilibrium)."""
+        if not self.is_symmetric():
+            raise Exception('Replicator dynamics need a symmetric game')
+        payoffs = self._support_payoffs([list(range(size)) for size in self.payoffs.shape[:-1]])[..., 0]
+        num_actions = payoffs.shape[0]
+        starts = np.random.default_rng(seed).dirichlet(np.ones(num_actions), size=samples)
+        result = replicator(payoffs, starts, method, step, max_steps, tolerance)
+        centers, labels = cluster_states(result['states'], cluster_tolerance)
+        found = []
+        for index, center in enumerate(centers):
+            members = labels == index
+            center = np.where(center >= cluster_tolerance, center, 0.0)
+            center = center / center.sum()
+            found.append({'state': {self.action_labels[0][action]: float(prob) for action, prob in enumerate(center)
+                                    if prob > 0},
+                          'basin': float(members.mean()),
+                          'converged': float(result['converged'][members].mean()),
+                          'is_nash': self.is_nash([list(center)] * self.player_count)})
+        found.sort(key=lambda group: -group['basin'])
+        if self._subscribers:
+            self._emit('evolutionary_states', method=method, samples=samples, states=found)
+        return found
+
+    def update_payoffs(self, delta):
+        """Add delta, an np.array which broadcasts to the shape of the payoffs, to the payoffs and forget what was
+           worked out from the old payoffs (dominated strategies, symmetries and the potential). The payoffs array
+           is replaced, not changed in place. Follow with track_equilibria to update equilibria found before the
+           change."""
+        if not isinstance(self.payoffs, np.ndarray):
+            raise Exception('update_payoffs needs payoffs in an np.array')
+        self.payoffs = self.payoffs + delta
+        self.dominated = [[] for ii in range(self.player_count)]
+        self._symmetries = None
+        self._symmetry_structure = None
+        self._potential = None
+
+    def track_equilibria(self, previous, fallback=True):
+        """Find the equilibria after a small change to the payoffs (see update_payoffs), starting from previous,
+           the equilibria before the change as returned by find_all_equilibria.
+           Each previous equilibrium is corrected by Newton's method on its own support. If that fails, because
+           the equilibrium has left its support, the neighbouring supports (one action added or dropped for one
+           player) are tried, starting from the old probabilities. If any previous equilibrium can't be followed
+           all the equilibria are found again with find_all_equilibria, unless fallback is False in which case
+           it is just left out. Equilibria which appear without a previous one nearby are only found by the
+           fallback. self.tracking_failed lists the previous equilibria which couldn't be followed.
+           Returns a list of equilibria, lists of dicts of action label: float probability like
+           find_all_equilibria's."""
+        stats = self.stats
+        result = []
+        self.tracking_failed = []
+        for equilibrium in previous:
+            tracked = self._track_equilibrium(self._action_indices(self.carnate_profile(equilibrium)))
+            if tracked is None:
+                self.tracking_failed.append(equilibrium)
+                if stats is not None:
+                    stats.count('tracking_failures')
+                if self._subscribers:
+                    self._emit('tracking_failed', equilibrium=equilibrium)
+                if fallback:
+                    return list(self.find_all_equilibria())
+                continue
+            if stats is not None:
+                stats.count('equilibria_tracked')
+            if self._subscribers:
+                self._emit('equilibrium_tracked', previous=equilibrium, equilibrium=self._sub_action_labels(tracked))
+            if not any(self._same_profile(tracked, other) for other in result):
+                result.append(tracked)
+        return [self._sub_action_labels(tracked) for tracked in result]
+
+    def _action_indices(self, profile):
+        """Convert the action labels of a result like find_all_equilibria's back to action indices, the reverse
+           of _sub_action_labels."""
+        return [{self.action_labels[player].index(label): prob for label, prob in player_profile.items()}
+                for player, player_profile in enumerate(profile)]
+
+    def _track_equilibrium(self, profile):
+        """Follow one equilibrium, a list of dicts of float probabilities, to the current payoffs.
+           Returns the new equilibrium or None."""
+        support = [sorted(action for action, prob in player_profile.items() if prob > self._wiggle)
+                   for player_profile in profile]
+        for candidate in [support] + self._neighbour_supports(support):
+            start = []
+            for player, actions in enumerate(candidate):
+                # actions being added start with a little probability
+                probs = np.array([profile[player].get(action, 0.0) for action in actions]) + 0.01
+                start.append(probs / probs.sum())
+            sizes = [len(actions) for actions in candidate]
+            coefficients = indifference_coefficients(self._support_payoffs(candidate))
+            probs = newton(coefficients, np.concatenate(start), sizes)
+            if probs is None or probs.min() <= self._wiggle or probs.max() > 1 + self._wiggle:
+                continue
+            tracked = [{action: float(prob) for action, prob in zip(actions, player_probs)}
+                       for actions, player_probs in zip(candidate, split(probs, sizes))]
+            if not self._timed_is_dominated(Profile.from_dicts(tracked, self.payoffs.shape[:-1])):
+                return tracked
+        return None
+
+    def _neighbour_supports(self, support):
+        """Return the supports which differ from support by one player dropping or adding one action."""
+        result = []
+        for player, actions in enumerate(support):
+            if len(actions) > 1:
+                for action in actions:
+                    result.append(support[:player] + [[other for other in actions if other != action]] +
+                                  support[player + 1:])
+            for action in range(self.payoffs.shape[player]):
+                if action not in actions:
+                    result.append(support[:player] + [sorted(actions + [action])] + support[player + 1:])
+        return result
+
+    def _same_profile(self, profile, other):
+        """Whether two profiles, lists of dicts of float probabilities, are the same up to wiggle."""
+        for player_profile, other_profile in zip(profile, other):
+            for action in set(player_profile) | set(other_profile):
+                if abs(player_profile.get(action, 0.0) - other_profile.get(action, 0.0)) > self._wiggle:
+                    return False
+        return True
+
+    def subs_parameters(self, values):
+        """Return a new Game with the payoff parameters replaced by numbers.
+           Values is a dict of parameter (a sympy symbol or its name): number."""
+        payoffs = self._grid_payoffs(self._parameter_values(values), ())
+        return Game(payoffs, player_labels=self.player_labels, action_labels=self.action_labels,
+                    numeric=self.numeric)
+
+    def find_parametric_equilibria(self, grid):
+        """Find the equilibria of a game whose payoffs contain sympy parameters at every point of a grid of
+           parameter values. Grid is a dict of parameter (a sympy symbol or its name): np.array of values, the
+           arrays are broadcast together to give the grid.
+           The indifference equations of each support are solved once, with the parameters as unknown constants,
+           and the solutions are evaluated over the whole grid with numpy rather than solving each point.
+           Yields (solution, probabilities, valid) for each solution which is a nash equilibrium somewhere on the
+           grid. Solution is a list of dicts of sympy expressions, as yielded by find_all_equilibria,
+           probabilities is the same with np.arrays of the values over the grid, and valid is a boolean np.array
+           which is True where the probabilities are in range and no player can do better.
+           The solutions are the generic ones, at parameter values where the equations of a support degenerate
+           there may be equilibria which are only found by solving that game directly (see subs_parameters)."""
+        values = self._parameter_values(grid)
+        grid_shape = values[0].shape if values else ()
+        payoffs = self._grid_payoffs(values, grid_shape)
+        for support in iter_subset_combos([list(range(size)) for size in self.payoffs.shape[:-1]]):
+            if is_pure(support):
+                solutions = [[{actions[0]: 1} for actions in support]]
+            else:
+                solutions = self._get_indifference_probs(support)
+            for solution in solutions:
+                mixes, valid = self._grid_profile(solution, values, grid_shape)
+                valid &= self._grid_is_nash(payoffs, mixes, support)
+                if valid.any():
+                    probabilities = [{action: mixes[player][..., action] for action in player_solution}
+                                     for player, player_solution in enumerate(solution)]
+                    yield solution, probabilities, valid
+
+    def _parameter_values(self, grid):
+        """Return a list of np.arrays, the values in grid of each of self.parameters, broadcast together."""
+        given = {str(parameter): value for parameter, value in grid.items()}
+        names = [str(parameter) for parameter in self.parameters]
+        unknown = sorted(set(given) - set(names))
+        if unknown:
+            raise Exception('{} are not payoff parameters, the parameters are {}'.format(unknown, names))
+        missing = [name for name in names if name not in given]
+        if missing:
+            raise Exception('No values given for parameters {}'.format(missing))
+        return np.broadcast_arrays(*[np.asarray(given[name], dtype=float) for name in names])
+
+    def _grid_payoffs(self, values, grid_shape):
+        """Return the payoffs at every point of the grid, an np.array of shape grid_shape + payoffs shape."""
+        from sympy import lambdify
+        with np.errstate(all='ignore'):
+            entries = lambdify(self.parameters, list(self.payoffs.flat), 'numpy')(*values)
+        entries = [np.broadcast_to(np.asarray(entry, dtype=float), grid_shape) for entry in entries]
+        return np.stack(entries, axis=-1).reshape(grid_shape + self.payoffs.shape)
+
+    def _grid_profile(self, solution, values, grid_shape):
+        """Evaluate a solution from _get_indifference_probs over the grid.
+           Returns a list of np.arrays, each player's probabilities for all his actions at each point of the
+           grid, and a boolean np.array which is True where the probabilities are real and in range."""
+        from sympy import lambdify, sympify
+        mixes = []
+        valid = np.ones(grid_shape, dtype=bool)
+        for player, player_solution in enumerate(solution):
+            mix = np.zeros(grid_shape + (self.payoffs.shape[player],))
+            actions = list(player_solution)
+            exprs = [sympify(player_solution[action]) for action in actions]
+            if any(expr.free_symbols - set(self.parameters) for expr in exprs):
+                # a continuum of solutions, play the support evenly like carnate_profile
+                mix[..., actions] = 1.0 / len(actions)
+            else:
+                with np.errstate(all='ignore'):
+                    probs = lambdify(self.parameters, exprs, 'numpy')(*values)
+                probs = np.stack([np.broadcast_to(np.asarray(prob, dtype=complex), grid_shape)
+                                  for prob in probs], axis=-1)
+                valid &= (np.abs(probs.imag) <= self._wiggle).all(axis=-1)
+                mix[..., actions] = np.nan_to_num(probs.real)
+                valid &= (mix[..., actions] > self._wiggle).all(axis=-1)
+                valid &= (mix[..., actions] <= 1 + self._wiggle).all(axis=-1)
+            mixes.append(mix)
+        return mixes, valid
+
+    def _grid_is_nash(self, payoffs, mixes, support):
+        """Return a boolean np.array, True at the points of the grid where no player does better than the
+           actions in his support, given the other players' mixes."""
+        letters = [chr(ord('a') + player) for player in range(self.player_count)]
+        valid = True
+        for player in range(self.player_count):
+            others = [other for other in range(self.player_count) if other != player]
+            subscripts = ','.join(['...' + ''.join(letters)] + ['...' + letters[other] for other in others])
+            utilities = np.einsum(subscripts + '->...' + letters[player], payoffs[..., player],
+                                  *[mixes[other] for other in others])
+            valid = valid & (utilities.max(axis=-1) <= utilities[..., support[player]].min(axis=-1) + self._wiggle)
+        return valid
+
+    def estimate_work(self, sample_size=10, reduce=True, use_symmetry=None, seed=None, time_budget=10.0):
+        """Estimate how much work find_all_equilibria and find_pure would do without running them.
+           The number of supports is counted for the whole game, after removing the strategies iesds finds
+           to be dominated (if reduce is True, self.dominated is left unchanged) and, if symmetries are used (see
+           find_all_equilibria for use_symmetry), after skipping supports which are the same up to a symmetry of
+           the players.
+           The cost of each backend is calibrated by solving up to sample_size random supports and checking
+           sample_size random pure profiles, sampling stops early once time_budget seconds have been spent
+           (a single large support can still take longer than that). The samples aren't counted in self.stats.
+           For 2 x N games which find_all_equilibria solves in closed form (see solve_2xn) the closed form solve
+           is timed instead, and its entry in backends has closed_form True.
+           Returns a dict."""
+        action_shape = [int(actions) for actions in self.payoffs.shape[:-1]]
+        cells = int(np.prod(action_shape))
+        result = {'cells': cells, 'supports': _count_supports(action_shape), 'sample_size': sample_size}
+        # memory for the dense payoffs array, for lazy payoffs that is what to_array would need
+        if isinstance(self.payoffs, np.ndarray):
+            result['payoff_bytes'] = int(self.payoffs.nbytes)
+        else:
+            result['payoff_bytes'] = cells * self.player_count * self.payoffs.dtype.itemsize
+        if reduce:
+            saved = self.dominated
+            self.dominated = [list(player_dominated) for player_dominated in saved]
+            try:
+                self.iesds()
+                reduced_shape = [actions - len(player_dominated)
+                                 for actions, player_dominated in zip(action_shape, self.dominated)]
+            finally:
+                self.dominated = saved
+            result['supports_after_iesds'] = _count_supports(reduced_shape)
+        solved = result['supports']
+        if self._use_symmetry(use_symmetry):
+            classes, full = self._symmetry_classes()
+            if full:
+                # one support is solved for each multiset of supports within a class
+                solved = 1
+                for aclass in classes:
+                    solved *= comb(2 ** action_shape[aclass[0]] - 1 + len(aclass) - 1, len(aclass))
+            else:
+                # at best one support per orbit, so this is a lower bound
+                solved = -(-result['supports'] // len(self.symmetries()))
+            result['supports_after_symmetry'] = solved
+        rng = Random(seed)
+        backends = {}
+        stats = self.stats
+        self.stats = None # the samples aren't part of any solve
+        try:
+            if sample_size > 0:
+                self._sample_backends(action_shape, cells, solved, sample_size, time_budget, rng, backends)
+        finally:
+            self.stats = stats
+        result['backends'] = backends
         return result
 
+    def _sample_backends(self, action_shape, cells, solved, sample_size, time_budget, rng, backends):
+        """Time sample supports and pure profiles for estimate_work, adding the estimates to backends."""
+        if self._closed_form_applies() and solve_2xn(self.payoffs, self._wiggle) is not None:
+            # find_all_equilibria solves the whole game in closed form, time that instead
+            start = perf_counter()
+            for ii in range(sample_size):
+                solve_2xn(self.payoffs, self._wiggle)
+            per_solve = (perf_counter() - start) / sample_size
+            backends['find_all_equilibria'] = {'calls': 1, 'seconds_per_call': per_solve, 'seconds': per_solve,
+                                               'sampled': sample_size, 'closed_form': True}
+        else:
+            self._sample_supports(action_shape, solved, sample_size, time_budget, rng, backends)
+        start = perf_counter()
+        for ii in range(sample_size):
+            profile = []
+            for actions in action_shape:
+                player_profile = [0] * actions
+                player_profile[rng.randrange(actions)] = 1
+                profile.append(player_profile)
+            self.is_nash(profile)
+        per_cell = (perf_counter() - start) / sample_size
+        backends['find_pure'] = {'calls': cells, 'seconds_per_call': per_cell, 'seconds': per_cell * cells}
+
+    def _sample_supports(self, action_shape, solved, sample_size, time_budget, rng, backends):
+        """Estimate find_all_equilibria's support enumeration from the time to solve sample supports."""
+        start = perf_counter()
+        sampled = 0
+        while sampled < sample_size and (sampled == 0 or perf_counter() - start < time_budget):
+            support = []
+            for actions in action_shape:
+                subset = rng.randrange(1, 2 ** actions)
+                support.append(tuple(action for action in range(actions) if subset >> action & 1))
+            self.find_support_equilibria(support)
+            sampled += 1
+        per_support = (perf_counter() - start) / sampled
+        backends['find_all_equilibria'] = {'calls': solved, 'seconds_per_call': per_support,
+                                           'seconds': per_support * solved, 'sampled': sampled}
+
+    def get_stats(self):
+        """Return the solver stats collected so far as a dict, or None if the game wasn't created with
+           stats=True."""
+        if self.stats is None:
+            return None
+        return self.stats.as_dict()
+
     def get_payoffs_slice(self, x_player, y_player, others=None):
         """x_player is a tuple player index, action0 index, action1 index, and optionally
            more tuples indicating fractions of other actions by the x player.
@@ -628,6 +1564,63 @@ class Game(object):
         return result
 
 
+def _is_sympy(value, class_name):
+    """Check whether value is an instance of the named sympy class. If sympy hasn't been imported there can't be
+       any sympy objects, so this doesn't import it."""
+    sympy = sys.modules.get('sympy')
+    if sympy is None:
+        return False
+    return isinstance(value, getattr(sympy, class_name))
+
+def _payoff_parameters(payoffs):
+    """Return the sympy symbols in an np.array of payoffs sorted by name, [] if the payoffs are numbers."""
+    if not isinstance(payoffs, np.ndarray) or payoffs.dtype != object:
+        return []
+    parameters = set()
+    for value in payoffs.flat:
+        parameters |= getattr(value, 'free_symbols', set())
+    return sorted(parameters, key=str)
+
+def _count_supports(action_shape):
+    """Number of supports (a nonempty set of actions for every player) for the given numbers of actions."""
+    result = 1
+    for actions in action_shape:
+        result *= 2 ** actions - 1
+    return result
+
+def _multiset_permutations(entries):
+    """Generate the distinct orderings of entries (a list which may contain repeats), starting with the
+       original order."""
+    if len(entries) <= 1:
+        yield list(entries)
+        return
+    used = set()
+    for ii, first in enumerate(entries):
+        if first in used:
+            continue
+        used.add(first)
+        for rest in _multiset_permutations(entries[:ii] + entries[ii + 1:]):
+            yield [first] + rest
+
+def _product_lists(choices):
+    """Generate every combination of one element from each list in choices."""
+    if not choices:
+        yield []
+        return
+    for first in choices[0]:
+        for rest in _product_lists(choices[1:]):
+            yield [first] + rest
+
+def _product_permutations(classes):
+    """Generate every combination of one permutation of each list in classes."""
+    if not classes:
+        yield []
+        return
+    for first in permutations(classes[0]):
+        for rest in _product_permutations(classes[1:]):
+            yield [first] + rest
+
+
 def zero_sum_2_player(payoffs):
     """Factory method to create a zero-sum 2-player gane from a simplified payoffs array"""
     # payoffs is a two layer deep array, we will replace the innermost element with an array x, -x
@@ -0,0 +1,118 @@
+"""Search for approximate nash equilibria among k-uniform strategy profiles (Lipton, Markakis and Mehta).
+   A k-uniform strategy plays each action with a probability which is a multiple of 1/k, it is a multiset of k
+   actions. Every game has a k-uniform epsilon-equilibrium for k large enough (for two players, k of order
+   log(actions) / epsilon ** 2 with payoffs in [0, 1]), so searching them all gives an epsilon-equilibrium with a
+   known bound instead of an exact one.
+   The last player's strategies are handled as one batch: the payoffs are contracted with the strategies of the
+   other players once, for many of their profiles at a time, and the regrets of every player for every strategy
+   of the last player follow from matrix products. Strategies which can't beat the best epsilon found so far, by
+   a bound from the players' pure best responses, are skipped."""
+
+from itertools import combinations_with_replacement
+from math import prod
+
+import numpy as np
+
+from .control import stop_reason
+
+
+def k_uniform_strategies(num_actions, k):
+    """Return an np.array with a row for each k-uniform strategy over num_actions actions."""
+    combos = np.array(list(combinations_with_replacement(range(num_actions), k)))
+    counts = np.zeros((len(combos), num_actions))
+    np.add.at(counts, (np.arange(len(combos))[:, None], combos), 1)
+    return counts / k
+
+def regret_bounds(payoffs):
+    """Return a list with an np.array per player, the least regret each of his actions can have whatever the
+       other players do: how much worse it is than his best other pure action against their worst case."""
+    num_players = payoffs.shape[-1]
+    result = []
+    for player in range(num_players):
+        player_payoffs = np.moveaxis(payoffs[..., player], player, 0).reshape(payoffs.shape[player], -1)
+        margins = (player_payoffs[:, None, :] - player_payoffs[None, :, :]).min(axis=-1) # [better, worse]
+        result.append(np.maximum(margins.max(axis=0), 0))
+    return result
+
+def _contraction(num_players, player):
+    """Einsum subscripts contracting the payoffs of player with the strategies of every player except player
+       and the last one, for a batch (axis Z) of profiles. If there are no such players there is no batch axis."""
+    letters = [chr(ord('a') + ii) for ii in range(num_players)]
+    last = num_players - 1
+    others = [other for other in range(last) if other != player]
+    kept = letters[player] + letters[last] if player != last else letters[last]
+    batch = 'Z' if others else ''
+    return ''.join(letters) + ''.join(',Z' + letters[other] for other in others) + '->' + batch + kept, others
+
+def search(payoffs, k=2, batch_size=1000, epsilon=None, max_profiles=None, deadline=None, cancel=None,
+           progress=None):
+    """Find the k-uniform profile with the least epsilon (the most any player could gain by changing strategy).
+       Profiles are evaluated in batches of batch_size profiles of all the players but the last, against every
+       strategy of the last player. The search stops early once epsilon is reached, after max_profiles profiles
+       have been evaluated, at deadline or when cancel is cancelled. Progress is called as
+       progress(fraction_done, best_epsilon) after each batch.
+       Returns a dict with the best profile's mixes (a list of np.arrays), its epsilon, the number of profiles
+       evaluated and pruned, and the status ('complete', 'converged', 'max_profiles', 'deadline' or
+       'cancelled')."""
+    payoffs = np.asarray(payoffs, dtype=float)
+    num_players = payoffs.shape[-1]
+    last = num_players - 1
+    strategies = [k_uniform_strategies(size, k) for size in payoffs.shape[:-1]]
+    bounds = [player_strategies @ bound for player_strategies, bound in zip(strategies, regret_bounds(payoffs))]
+    for player in range(num_players):
+        # most promising strategies first, so a good epsilon is found early and prunes more
+        order = np.argsort(bounds[player], kind='stable')
+        strategies[player] = strategies[player][order]
+        bounds[player] = bounds[player][order]
+    contractions = [_contraction(num_players, player) for player in range(num_players)]
+    head_sizes = [len(player_strategies) for player_strategies in strategies[:last]]
+    total = prod(head_sizes)
+    best_epsilon = np.inf
+    best = None
+    evaluated = 0
+    pruned = 0
+    status = 'complete'
+    for start in range(0, total, batch_size):
+        reason = stop_reason(deadline, cancel)
+        if reason is not None:
+            status = reason
+            break
+        if max_profiles is not None and evaluated >= max_profiles:
+            status = 'max_profiles'
+            break
+        stop = min(start + batch_size, total)
+        indices = np.unravel_index(np.arange(start, stop), head_sizes) if head_sizes else [np.zeros(1, dtype=int)]
+        keep = np.ones(stop - start, dtype=bool)
+        for player in range(last):
+            keep &= bounds[player][indices[player]] < best_epsilon
+        last_keep = bounds[last] < best_epsilon
+        pruned += (stop - start) * len(strategies[last]) - int(keep.sum()) * int(last_keep.sum())
+        if not keep.any() or not last_keep.any():
+            continue
+        mixes = [strategies[player][indices[player][keep]] for player in range(last)]
+        last_mixes = strategies[last][last_keep]
+        regrets = []
+        for player, (subscripts, others) in enumerate(contractions):
+            utilities = np.einsum(subscripts, payoffs[..., player], *[mixes[other] for other in others],
+                                  optimize='greedy')
+            if not others:
+                utilities = np.broadcast_to(utilities, (int(keep.sum()),) + utilities.shape)
+            if player == last:
+                values = utilities @ last_mixes.T # (profiles, last strategies)
+                regrets.append(utilities.max(axis=-1)[:, None] - values)
+            else:
+                utilities = utilities @ last_mixes.T # (profiles, actions, last strategies)
+                regrets.append(utilities.max(axis=1) - np.einsum('za,zas->zs', mixes[player], utilities))
+        epsilons = np.max(regrets, axis=0)
+        evaluated += epsilons.size
+        flat = int(np.argmin(epsilons))
+        row, column = np.unravel_index(flat, epsilons.shape)
+        if epsilons[row, column] < best_epsilon:
+            best_epsilon = float(epsilons[row, column])
+            best = [mix[row] for mix in mixes] + [last_mixes[column]]
+        if progress is not None:
+            progress(stop / total, best_epsilon)
+        if epsilon is not None and best_epsilon <= epsilon:
+            status = 'converged'
+            break
+    return {'mixes': best, 'epsilon': best_epsilon, 'evaluated': evaluated, 'pruned': pruned, 'status': status}
@@ -0,0 +1,129 @@
+"""Payoffs computed on demand from a function instead of being stored in a dense numpy array.
+   A LazyPayoffs object can be passed to Game in place of the payoffs array. It supports the indexing
+   Game does on payoffs, evaluating and caching only the cells (action profiles) which are actually read."""
+
+from collections import OrderedDict
+from itertools import product
+import numpy as np
+
+
+class LazyPayoffs(object):
+    """ Payoffs for a game given by a function of the action profile."""
+
+    def __init__(self, fun, action_shape, cache_size=100000, batch_fun=None):
+        """Fun takes a tuple of actions (one per player) and returns the payoff for each player.
+           Action_shape is the number of actions for each player.
+           At most cache_size cells are kept, the least recently used are dropped first.
+           Batch_fun, if given, takes an np.array of action profiles with shape (cells, players) and returns
+           the payoffs with shape (cells, players). It is used whenever several cells are needed at once,
+           and is used for single cells too if fun is None."""
+        if fun is None and batch_fun is None:
+            raise Exception('Either fun or batch_fun is required')
+        self.fun = fun
+        self.batch_fun = batch_fun
+        self.action_shape = tuple(action_shape)
+        self.shape = self.action_shape + (len(self.action_shape),)
+        self.ndim = len(self.shape)
+        self.dtype = np.dtype(float)
+        self.cache_size = cache_size
+        self.evaluations = 0 # number of cells evaluated, including ones evaluated again after being dropped
+        self._cache = OrderedDict()
+
+    def __repr__(self):
+        return 'LazyPayoffs shape {} cached cells {}'.format(self.shape, len(self._cache))
+
+    def cell(self, actions):
+        """Return the payoffs for all players for the given action profile (a tuple) as an np.array."""
+        actions = tuple(int(action) for action in actions)
+        cache = self._cache
+        if actions in cache:
+            cache.move_to_end(actions)
+            return cache[actions]
+        if self.fun is not None:
+            value = np.asarray(self.fun(actions), dtype=float)
+        else:
+            value = np.asarray(self.batch_fun(np.array([actions]))[0], dtype=float)
+        self.evaluations += 1
+        self._store(actions, value)
+        return value
+
+    def cells(self, actions_list):
+        """Return the payoffs for a list of action profiles as an np.array with shape (cells, players).
+           Cells which aren't cached are evaluated together with batch_fun if there is one."""
+        actions_list = [tuple(int(action) for action in actions) for actions in actions_list]
+        result = np.zeros((len(actions_list), len(self.action_shape)))
+        missing = []
+        for ii, actions in enumerate(actions_list):
+            if actions in self._cache:
+                self._cache.move_to_end(actions)
+                result[ii] = self._cache[actions]
+            else:
+                missing.append(ii)
+        if not missing:
+            return result
+        if self.batch_fun is not None:
+            values = np.asarray(self.batch_fun(np.array([actions_list[ii] for ii in missing])), dtype=float)
+            self.evaluations += len(missing)
+            for ii, value in zip(missing, values):
+                result[ii] = value
+                self._store(actions_list[ii], value)
+        else:
+            for ii in missing:
+                result[ii] = self.cell(actions_list[ii])
+        return result
+
+    def _store(self, actions, value):
+        """Add a cell to the cache, dropping the least recently used cell if the cache is full."""
+        if self.cache_size <= 0:
+            return
+        self._cache[actions] = value
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def __getitem__(self, key):
+        """Index like the equivalent numpy array. A tuple of one int per player returns the payoffs for that
+           cell without evaluating anything else, anything with slices evaluates just the block selected."""
+        if type(key) != tuple:
+            key = (key,)
+        if any(elm is Ellipsis for elm in key):
+            where = [elm is Ellipsis for elm in key].index(True)
+            fill = self.ndim - len(key) + 1
+            key = key[:where] + (slice(None),) * fill + key[where + 1:]
+        num_players = len(self.action_shape)
+        action_key = key[:num_players]
+        player_key = key[num_players:]
+        if len(action_key) == num_players and all(isinstance(elm, (int, np.integer)) for elm in action_key):
+            value = self.cell(action_key)
+            if player_key:
+                return value[player_key[0]]
+            return value
+        # a block: find the actions selected along each player axis
+        action_key = action_key + (slice(None),) * (num_players - len(action_key))
+        axes = []
+        keep = [] # which player axes stay in the result
+        for dim, elm in zip(self.action_shape, action_key):
+            if isinstance(elm, (int, np.integer)):
+                axes.append([int(elm) % dim])
+                keep.append(False)
+            elif isinstance(elm, slice):
+                axes.append(list(range(*elm.indices(dim))))
+                keep.append(True)
+            else:
+                axes.append([int(ii) % dim for ii in np.asarray(elm).ravel()])
+                keep.append(True)
+        values = self.cells(list(product(*axes)))
+        block = values.reshape(tuple(len(elm) for elm in axes) + (num_players,))
+        block = block.reshape(tuple(len(elm) for elm, kept in zip(axes, keep) if kept) + (num_players,))
+        if player_key:
+            return block[(Ellipsis,) + player_key]
+        return block
+
+    def __array__(self, dtype=None, copy=None):
+        result = self[...]
+        if dtype is not None:
+            result = result.astype(dtype)
+        return result
+
+    def to_array(self):
+        """Evaluate every cell and return the dense payoffs array."""
+        return self[...]
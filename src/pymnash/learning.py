@@ -0,0 +1,128 @@
+"""Iterative solvers which find approximate nash equilibria of games too big for support enumeration:
+   fictitious play, regret matching and hedge (multiplicative weights).
+   Each iteration is a tensor contraction of the payoffs with the players' current mixed strategies, and a number
+   of restarts from different random strategies are run side by side as one batch, each player's strategies being
+   an np.array with a row per restart. The quality of a profile is epsilon, the most any player could gain by
+   switching to his best pure action; an exact nash equilibrium has epsilon 0."""
+
+import numpy as np
+
+from .control import stop_reason
+
+methods = ['fictitious_play', 'regret_matching', 'hedge']
+
+
+def utility_paths(payoffs, restarts):
+    """Work out the einsum contraction order for action_utilities once, as it is the same every iteration."""
+    mixes = [np.ones((restarts, size)) / size for size in payoffs.shape[:-1]]
+    return [np.einsum_path(subscripts, payoffs[..., player], *operands, optimize='greedy')[0]
+            for player, (subscripts, operands) in enumerate(_contractions(mixes))]
+
+def _contractions(mixes):
+    """The einsum subscripts and mixes to contract with each player's payoffs, Z is the restarts axis."""
+    num_players = len(mixes)
+    letters = [chr(ord('a') + player) for player in range(num_players)]
+    for player in range(num_players):
+        others = [other for other in range(num_players) if other != player]
+        subscripts = ''.join(letters) + ''.join(',Z' + letters[other] for other in others) + '->Z' + letters[player]
+        yield subscripts, [mixes[other] for other in others]
+
+def action_utilities(payoffs, mixes, paths=None):
+    """Payoffs is an np.array, shape actions + (players,), mixes a list with an np.array per player of shape
+       (restarts, actions). Returns a list with an np.array per player of the same shape as his mixes, the
+       expected payoff of each of his actions against the other players' mixes."""
+    result = []
+    for player, (subscripts, operands) in enumerate(_contractions(mixes)):
+        optimize = 'greedy' if paths is None else paths[player]
+        result.append(np.einsum(subscripts, payoffs[..., player], *operands, optimize=optimize))
+    return result
+
+def epsilons(payoffs, mixes, paths=None):
+    """Return an np.array with the epsilon of each restart's profile, the most any player can gain by changing
+       his strategy."""
+    gains = [utilities.max(axis=-1) - (utilities * mix).sum(axis=-1)
+             for utilities, mix in zip(action_utilities(payoffs, mixes, paths), mixes)]
+    return np.max(gains, axis=0)
+
+def _start_mixes(sizes, restarts, rng):
+    """Uniform strategies for the first restart, random ones for the others."""
+    mixes = []
+    for size in sizes:
+        mix = rng.dirichlet(np.ones(size), size=restarts)
+        mix[0] = 1.0 / size
+        mixes.append(mix)
+    return mixes
+
+def solve(payoffs, method='regret_matching', iterations=1000, restarts=1, epsilon=None, check_every=10,
+          checkpoint_every=None, learning_rate=None, seed=None, deadline=None, cancel=None, progress=None):
+    """Run one of the iterative methods for up to iterations iterations on payoffs, an np.array of numbers.
+       Every method returns the average of the strategies played over the iterations, which is what converges.
+       Fictitious play best responds to the other players' averages, regret matching plays in proportion to
+       positive cumulative regrets and hedge plays in proportion to exp(learning_rate * cumulative payoff).
+       Every check_every iterations epsilon is worked out, and the run stops once some restart's average is
+       within epsilon of an equilibrium. Every checkpoint_every iterations the averages are saved in the
+       checkpoints. Deadline, cancel and progress are as for Game.find_all_equilibria, except progress is called
+       as progress(fraction_of_iterations_done, best_epsilon) at each check.
+       Returns a dict with the averaged mixes (a list of np.arrays of shape (restarts, actions)), the epsilon
+       of each restart, the best restart, the iterations done, the status ('complete', 'converged', 'deadline'
+       or 'cancelled') and the checkpoints."""
+    if method not in methods:
+        raise Exception('Unknown method {}, the methods are {}'.format(method, methods))
+    payoffs = np.asarray(payoffs, dtype=float)
+    sizes = payoffs.shape[:-1]
+    rng = np.random.default_rng(seed)
+    paths = utility_paths(payoffs, restarts)
+    mixes = _start_mixes(sizes, restarts, rng)
+    averages = [mix.copy() for mix in mixes]
+    cumulative = [np.zeros_like(mix) for mix in mixes] # regrets for regret matching, payoffs for hedge
+    if learning_rate is None:
+        spread = np.ptp(payoffs) or 1.0
+        learning_rate = np.sqrt(8 * np.log(max(sizes)) / iterations) / spread
+    checkpoints = []
+    status = 'complete'
+    restart_epsilons = None
+    checked = None # the iteration restart_epsilons are for
+    done = 0
+    for iteration in range(1, iterations + 1):
+        reason = stop_reason(deadline, cancel)
+        if reason is not None:
+            status = reason
+            break
+        if method == 'fictitious_play':
+            utilities = action_utilities(payoffs, averages, paths)
+            mixes = [np.eye(size)[np.argmax(player_utilities, axis=-1)]
+                     for size, player_utilities in zip(sizes, utilities)]
+        else:
+            utilities = action_utilities(payoffs, mixes, paths)
+            for player, player_utilities in enumerate(utilities):
+                if method == 'regret_matching':
+                    expected = (player_utilities * mixes[player]).sum(axis=-1, keepdims=True)
+                    cumulative[player] += player_utilities - expected
+                    positive = np.maximum(cumulative[player], 0)
+                    total = positive.sum(axis=-1, keepdims=True)
+                    safe_total = np.where(total > 0, total, 1)
+                    mixes[player] = np.where(total > 0, positive / safe_total, 1.0 / sizes[player])
+                else:
+                    cumulative[player] += player_utilities
+                    logits = learning_rate * cumulative[player]
+                    weights = np.exp(logits - logits.max(axis=-1, keepdims=True))
+                    mixes[player] = weights / weights.sum(axis=-1, keepdims=True)
+        for average, mix in zip(averages, mixes):
+            average += (mix - average) / (iteration + 1)
+        done = iteration
+        checkpoint = checkpoint_every is not None and iteration % checkpoint_every == 0
+        if iteration % check_every == 0 or checkpoint or iteration == iterations:
+            restart_epsilons = epsilons(payoffs, averages, paths)
+            checked = iteration
+            if checkpoint:
+                checkpoints.append({'iteration': iteration, 'epsilons': restart_epsilons,
+                                    'mixes': [average.copy() for average in averages]})
+            if progress is not None:
+                progress(iteration / iterations, float(restart_epsilons.min()))
+            if epsilon is not None and restart_epsilons.min() <= epsilon:
+                status = 'converged'
+                break
+    if checked != done:
+        restart_epsilons = epsilons(payoffs, averages, paths)
+    return {'mixes': averages, 'epsilons': restart_epsilons, 'best': int(np.argmin(restart_epsilons)),
+            'iterations': done, 'status': status, 'checkpoints': checkpoints}
@@ -0,0 +1,110 @@
+"""A small dense linear program solver (two phase simplex on a tableau), so pymnash doesn't need scipy.
+   It is meant for the modest sized programs of correlated equilibria, with up to a few thousand variables."""
+
+import numpy as np
+
+
+def linprog(c, A_ub=None, b_ub=None, A_eq=None, b_eq=None, tolerance=1e-9, max_iterations=None):
+    """Minimize c . x subject to A_ub x <= b_ub, A_eq x = b_eq and x >= 0.
+       Returns a dict with x, the objective value and the status ('optimal', 'infeasible', 'unbounded' or
+       'max_iterations'). x and value are None unless the status is 'optimal'."""
+    c = np.asarray(c, dtype=float)
+    num_vars = len(c)
+    A_ub = np.zeros((0, num_vars)) if A_ub is None else np.asarray(A_ub, dtype=float)
+    b_ub = np.zeros(0) if b_ub is None else np.asarray(b_ub, dtype=float)
+    A_eq = np.zeros((0, num_vars)) if A_eq is None else np.asarray(A_eq, dtype=float)
+    b_eq = np.zeros(0) if b_eq is None else np.asarray(b_eq, dtype=float)
+    num_ub = len(A_ub)
+    num_rows = num_ub + len(A_eq)
+    # columns: variables, slacks, artificials, right hand side
+    rows = np.zeros((num_rows, num_vars + num_ub))
+    rows[:num_ub, :num_vars] = A_ub
+    rows[:num_ub, num_vars:] = np.eye(num_ub)
+    rows[num_ub:, :num_vars] = A_eq
+    rhs = np.concatenate([b_ub, b_eq])
+    negative = rhs < 0
+    rows[negative] *= -1
+    rhs = np.abs(rhs)
+    # a slack with a nonnegative right hand side can start in the basis, other rows need an artificial
+    needs_artificial = np.ones(num_rows, dtype=bool)
+    needs_artificial[:num_ub] = negative[:num_ub]
+    artificial_rows = np.flatnonzero(needs_artificial)
+    num_artificial = len(artificial_rows)
+    num_columns = num_vars + num_ub + num_artificial
+    tableau = np.zeros((num_rows + 1, num_columns + 1))
+    tableau[:num_rows, :num_vars + num_ub] = rows
+    tableau[artificial_rows, num_vars + num_ub + np.arange(num_artificial)] = 1
+    tableau[:num_rows, -1] = rhs
+    basis = num_vars + np.arange(num_rows)
+    basis[artificial_rows] = num_vars + num_ub + np.arange(num_artificial)
+    if max_iterations is None:
+        max_iterations = 50 * (num_rows + num_columns)
+    if num_artificial:
+        # phase 1: minimize the sum of the artificials, the objective row holds reduced costs
+        tableau[-1, num_vars + num_ub:-1] = 1
+        tableau[-1] -= tableau[artificial_rows].sum(axis=0)
+        status = _simplex(tableau, basis, num_columns, tolerance, max_iterations)
+        if status != 'optimal':
+            return {'x': None, 'value': None, 'status': status}
+        if tableau[-1, -1] < -tolerance * max(1.0, np.abs(rhs).max()):
+            return {'x': None, 'value': None, 'status': 'infeasible'}
+        _drive_out(tableau, basis, num_vars + num_ub, tolerance)
+    # phase 2: the artificials may not enter any more
+    tableau[-1] = 0
+    tableau[-1, :num_vars] = c
+    in_basis = basis < num_vars
+    tableau[-1] -= c[basis[in_basis]] @ tableau[:-1][in_basis]
+    status = _simplex(tableau, basis, num_vars + num_ub, tolerance, max_iterations)
+    if status != 'optimal':
+        return {'x': None, 'value': None, 'status': status}
+    x = np.zeros(num_columns)
+    x[basis] = tableau[:-1, -1]
+    x = np.maximum(x[:num_vars], 0)
+    return {'x': x, 'value': float(c @ x), 'status': 'optimal'}
+
+def _simplex(tableau, basis, num_allowed, tolerance, max_iterations):
+    """Pivot until no column among the first num_allowed has a negative reduced cost.
+       The column with the most negative reduced cost enters, falling back to Bland's rule (the first such
+       column) after a run of pivots which don't improve the objective, so degenerate programs don't cycle."""
+    stalled = 0
+    for iteration in range(max_iterations):
+        costs = tableau[-1, :num_allowed]
+        if stalled > 50:
+            candidates = np.flatnonzero(costs < -tolerance)
+            if not len(candidates):
+                return 'optimal'
+            column = candidates[0]
+        else:
+            column = int(np.argmin(costs))
+            if costs[column] >= -tolerance:
+                return 'optimal'
+        entries = tableau[:-1, column]
+        positive = entries > tolerance
+        if not positive.any():
+            return 'unbounded'
+        ratios = np.full(len(entries), np.inf)
+        ratios[positive] = tableau[:-1, -1][positive] / entries[positive]
+        best = ratios.min()
+        ties = np.flatnonzero(ratios <= best + tolerance)
+        row = ties[np.argmin(basis[ties])] # Bland's rule among ties
+        stalled = stalled + 1 if best <= tolerance else 0
+        _pivot(tableau, row, column)
+        basis[row] = column
+    return 'max_iterations'
+
+def _pivot(tableau, row, column):
+    tableau[row] /= tableau[row, column]
+    factors = tableau[:, column].copy()
+    factors[row] = 0
+    tableau -= np.outer(factors, tableau[row])
+
+def _drive_out(tableau, basis, num_real, tolerance):
+    """After phase 1, pivot artificials still in the basis (at zero) out for real columns where possible.
+       Rows where that's impossible are redundant and are zeroed."""
+    for row in np.flatnonzero(basis >= num_real):
+        candidates = np.flatnonzero(np.abs(tableau[row, :num_real]) > tolerance)
+        if len(candidates):
+            _pivot(tableau, row, candidates[0])
+            basis[row] = candidates[0]
+        else:
+            tableau[row] = 0
@@ -11,18 +11,20 @@ import numpy as np
 from .util import dict_to_list
 from .game import Game
 from .node import Node
+from .events import EventSource
+from .control import stop_reason
 #import pdb; pdb.set_trace()
 
-class Nash_DAG:
+class Nash_DAG(EventSource):
     def __init__(self, *args, **kwargs):
+        """Verbose prints the events for nodes generated and scored, see EventSource.subscribe."""
         self.nodes = {}
-        if "verbose" in kwargs:
-            self.verbose = kwargs["verbose"]
-        else:
-            self.verbose = False
+        self.verbose = kwargs.get("verbose", False)
         self.default_start = kwargs.get('default_start')
         self.counter = 0
         self.analyzed = False
+        self.solve_status = None # 'complete', 'deadline' or 'cancelled' once set_subscores returns
+        self._scored = 0
 
 
     def generate_node(self, key):
@@ -59,35 +61,107 @@ class Nash_DAG:
                 newnode = self.generate_node(key)
                 newnode.parents.add(node.key)
                 self.nodes[key] = newnode
-                if self.verbose:
-                    print("new key", newnode.key)
+                if self._subscribers:
+                    self._emit('node_generated', key=newnode.key)
                 self.generate_subgraph(newnode)
 
-    def set_subscores(self, node, layer=0):
+    def set_subscores(self, node, layer=0, deadline=None, progress=None, cancel=None, support_timeout=None):
         """Set scores on all descendent nodes of this node.
-           Subgraph must already have been generated."""
+           Subgraph must already have been generated.
+           Scoring stops early once deadline (a time.time() value) has passed or cancel (a CancelToken) has been
+           cancelled, the nodes scored so far keep their scores. Progress, if given, is called as
+           progress(fraction_of_nodes_scored, nodes_scored) after every node is scored. Support_timeout is passed
+           on to find_all_equilibria for each node.
+           Afterwards self.solve_status is 'complete', 'deadline' or 'cancelled'.
+           Returns a boolean indicating the node was scored."""
+        self.solve_status = 'running'
+        self._scored = sum(1 for anode in self.nodes.values() if anode.scores is not None)
+        self._set_subscores(node, layer, deadline, progress, cancel, support_timeout)
+        if self.solve_status == 'running':
+            self.solve_status = 'complete'
+        return node.scores is not None
+
+    def _set_subscores(self, node, layer, deadline, progress, cancel, support_timeout):
+        """Recursive part of set_subscores. Returns True once the node is scored or the solve has stopped."""
         if node.scores is not None:
             return True
-        if self.set_scores(node):
+        reason = stop_reason(deadline, cancel)
+        if reason is not None:
+            self.solve_status = reason
+            return True # unwinds the loops in the callers, the node is left unscored
+        if self._score_node(node, progress, deadline, cancel, support_timeout):
             return True
-        print("set subscores node", node.key, "layer", layer)
+        if self._subscribers:
+            self._emit('node_visited', key=node.key, layer=layer)
         all_player_actions = self.get_player_actions(node)
         for actions in cartesian_product(*all_player_actions):
             key = self.get_child(node, actions)
             child = self.nodes[key]
             done_child = False
             while not done_child:
-                done_child = self.set_subscores(child, layer+1)
+                done_child = self._set_subscores(child, layer+1, deadline, progress, cancel, support_timeout)
+        if self.solve_status != 'running':
+            return True
+        return self._score_node(node, progress, deadline, cancel, support_timeout)
 
+    def _score_node(self, node, progress, deadline, cancel, support_timeout):
+        """Set_scores, reporting progress when the node is scored."""
+        if not self.set_scores(node, deadline, cancel, support_timeout):
+            return False
+        self._scored += 1
+        if progress is not None:
+            progress(self._scored / len(self.nodes), self._scored)
+        return True
 
-    def set_scores(self, node)->bool:
+    def set_scores(self, node, deadline=None, cancel=None, support_timeout=None)->bool:
         """Set the scores on this node if all its child nodes have scores.
+           Deadline, cancel and support_timeout are passed on to find_all_equilibria, if it stops early the
+           node is not scored and self.solve_status is set.
            Returns a boolean indicating scores were set."""
         if node.key not in self.nodes:
             raise Exception("Unknown node {}".format(node.key))
         if node.scores is not None:
             return True
         all_player_actions = self.get_player_actions(node)
+        game_array = self._node_payoffs(node, all_player_actions)
+        if game_array is None:
+            return False
+        thegame = Game(game_array)
+        equilibria = [equilibrium for equilibrium in thegame.find_all_equilibria(deadline=deadline, cancel=cancel,
+                                                                               support_timeout=support_timeout)]
+        if thegame.solve_status != 'complete':
+            self.solve_status = thegame.solve_status
+            return False
+        if not equilibria:
+            raise Exception("No equilibrium found for node {}, supports timed out: {}".format(node.key,
+                            thegame.timed_out_supports))
+        node.game = thegame
+        node.equilibria = equilibria
+        self._set_node_scores(node, thegame, equilibria, all_player_actions)
+        return True
+
+    def rescore(self, node)->bool:
+        """Set the scores on a node again after the scores of some of its children have changed a little.
+           The equilibria found when the node was last scored are followed to the new child scores with
+           Game.track_equilibria instead of solving the node's game from scratch. The node's parents are not
+           rescored. Returns a boolean indicating scores were set."""
+        if node.game is None:
+            return self.set_scores(node)
+        all_player_actions = self.get_player_actions(node)
+        game_array = self._node_payoffs(node, all_player_actions)
+        if game_array is None:
+            return False
+        node.game.update_payoffs(game_array - node.game.payoffs)
+        equilibria = node.game.track_equilibria(node.equilibria)
+        if not equilibria:
+            raise Exception("No equilibrium found for node {}".format(node.key))
+        node.equilibria = equilibria
+        self._set_node_scores(node, node.game, equilibria, all_player_actions)
+        return True
+
+    def _node_payoffs(self, node, all_player_actions):
+        """Return the payoffs of the game played at node, from the scores of its children, as an np.array.
+           Returns None if some child has no scores yet."""
         indices = [range(len(actions)) for actions in all_player_actions]
         shape = [len(actions) for actions in all_player_actions]
         shape.append(len(all_player_actions))
@@ -99,13 +173,15 @@ class Nash_DAG:
             key = self.get_child(node, actions)
             child = self.nodes[key]
             if child.scores is None:
-                return False
+                return None
             for ii in range(len(child.scores)):
                 where = list(action_indices)
                 where.append(ii)
                 game_array[tuple(where)] = child.scores[ii]
-        thegame = Game(game_array)
-        equilibria = [equilibrium for equilibrium in thegame.find_all_equilibria()]
+        return game_array
+
+    def _set_node_scores(self, node, thegame, equilibria, all_player_actions):
+        """Set the scores and player probabilities of node from the equilibria of its game."""
         profile_payoffs = None
         # breakpoint()
         for profile in equilibria:
@@ -115,13 +191,13 @@ class Nash_DAG:
             if profile_payoffs is None:
                 profile_payoffs = apayoffs
             else:
-                if not apayoffs == profile_payoffs:
-                    print("disaster!")
-                    print("node", node.key, "equilibria", equilibria, profile_payoffs, apayoffs)
-                    raise Exception("This only works when all equilibria have the same payoffs")
+                if not np.allclose(apayoffs, profile_payoffs, atol=thegame._wiggle):
+                    raise Exception("This only works when all equilibria have the same payoffs, node {} "
+                                    "equilibria {} payoffs {} and {}".format(node.key, equilibria, profile_payoffs,
+                                                                           apayoffs))
 
-        if self.verbose:
-            print("node", node.key, "profile", profile)
+        if self._subscribers:
+            self._emit('node_scored', key=node.key, profile=profile, scores=profile_payoffs)
         player_probs = []
         for actions, probs in zip(all_player_actions, profile):
             pa_dict = {}
@@ -132,4 +208,3 @@ class Nash_DAG:
                 player_probs.append(pa_dict)
         node.playerprobs = player_probs
         node.scores = profile_payoffs
-        return True
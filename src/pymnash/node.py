@@ -3,6 +3,7 @@
    Name is an identifier to use in a dictionary.
    Terminal indicates it is a terminal node.
    Scores is a list of player scores at this node.
+   Game and equilibria are the game played at a non-terminal node and its equilibria, once it has been scored.
 """
 class Node:
     def __init__(self, key, terminal=False, scores = None):
@@ -11,6 +12,8 @@ class Node:
         self.scores = scores
         self.parents = set()
         self.probs = None
+        self.game = None
+        self.equilibria = None
 
 
 
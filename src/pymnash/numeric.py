@@ -0,0 +1,95 @@
+"""The indifference equations for a support as numpy coefficient arrays, and a numeric solver for them.
+   For a support (the actions each player plays with nonzero probability) each player must get the same expected
+   payoff from every action in his support. The expected payoff of an action is multilinear in the other players'
+   probabilities, so the difference between the payoffs of two actions is given by a tensor of coefficients with
+   one axis per other player, read straight off the payoffs restricted to the support."""
+
+import numpy as np
+
+
+def indifference_coefficients(block):
+    """Block is the payoffs restricted to a support, shape (support sizes) + (players,).
+       Returns a list with an entry per player, an np.array with shape (k - 1,) + (support sizes of the other
+       players), where k is the player's support size. Entry [i] holds the coefficients of
+       payoff(first action) - payoff(action i + 1) for each combination of the other players' actions."""
+    num_players = block.shape[-1]
+    result = []
+    for player in range(num_players):
+        payoffs = np.moveaxis(block[..., player], player, 0)
+        result.append(payoffs[:1] - payoffs[1:])
+    return result
+
+def _others(player, num_players):
+    return [other for other in range(num_players) if other != player]
+
+def evaluate(coefficients, mixes):
+    """Return the residuals of the indifference equations and the probability sums for the given mixes
+       (a list of np.arrays, probabilities over each player's support), as one np.array."""
+    num_players = len(mixes)
+    residuals = []
+    for player, player_coefficients in enumerate(coefficients):
+        others = _others(player, num_players)
+        operands = [player_coefficients, [num_players] + others]
+        for other in others:
+            operands += [mixes[other], [other]]
+        residuals.append(np.einsum(*operands, [num_players]))
+        residuals.append([mixes[player].sum() - 1])
+    return np.concatenate(residuals)
+
+def jacobian(coefficients, mixes):
+    """Return the jacobian of evaluate with respect to all the probabilities (player 0's first)."""
+    num_players = len(mixes)
+    sizes = [len(mix) for mix in mixes]
+    offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(int)
+    rows = []
+    for player, player_coefficients in enumerate(coefficients):
+        others = _others(player, num_players)
+        block = np.zeros((sizes[player], offsets[-1]))
+        for other in others:
+            operands = [player_coefficients, [num_players] + others]
+            for third in others:
+                if third != other:
+                    operands += [mixes[third], [third]]
+            block[:-1, offsets[other]:offsets[other + 1]] = np.einsum(*operands, [num_players, other])
+        block[-1, offsets[player]:offsets[player + 1]] = 1
+        rows.append(block)
+    return np.vstack(rows)
+
+def split(probs, sizes):
+    """Split all the players' probabilities, one np.array, into a list with an np.array per player."""
+    offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(int)
+    return [probs[offsets[ii]:offsets[ii + 1]] for ii in range(len(sizes))]
+
+def newton(coefficients, probs, sizes, tolerance=1e-10, max_iterations=50):
+    """Solve the indifference equations by Newton's method starting from probs, all the players' probabilities in
+       one np.array. Returns the solution in the same form, or None if it didn't converge. The solution may be
+       out of range (negative probabilities), the caller should check."""
+    for iteration in range(max_iterations):
+        mixes = split(probs, sizes)
+        residuals = evaluate(coefficients, mixes)
+        if np.abs(residuals).max() < tolerance:
+            return probs
+        matrix = jacobian(coefficients, mixes)
+        probs = probs - np.linalg.lstsq(matrix, residuals, rcond=None)[0]
+    return None
+
+def newton_solutions(coefficients, sizes, starts=20, seed=0, tolerance=1e-10, max_iterations=50, wiggle=1e-6):
+    """Find probabilities solving the indifference equations by Newton's method from random starting mixes.
+       Sizes is the support size of each player. Returns a list of solutions, each a list of np.arrays,
+       with every probability in (wiggle, 1]. Only isolated solutions are found reliably, if the solutions form
+       a continuum just the first point found is returned."""
+    rng = np.random.default_rng(seed)
+    found = []
+    for start in range(starts):
+        probs = np.concatenate([rng.dirichlet(np.ones(size)) for size in sizes])
+        probs = newton(coefficients, probs, sizes, tolerance, max_iterations)
+        if probs is None:
+            continue
+        if probs.min() <= wiggle or probs.max() > 1 + wiggle:
+            continue
+        if any(np.abs(probs - other).max() < np.sqrt(tolerance) for other in found):
+            continue
+        found.append(probs)
+        if np.linalg.matrix_rank(jacobian(coefficients, split(probs, sizes))) < len(probs):
+            break # a continuum of solutions, other starts would just find other points of it
+    return [split(probs, sizes) for probs in found]
@@ -20,8 +20,8 @@ class Patrik(Nash_DAG):
 
 
     def generate_node(self, key):
-        if self.verbose:
-            print("generating node for key {}".format(key))
+        if self._subscribers:
+            self._emit('generating_node', key=key)
         terminal = False
         scores = None
         node_ = Node(key, terminal=terminal, scores=scores)
@@ -0,0 +1,188 @@
+"""A class for polymatrix games, where each player's payoff is the sum of payoffs from two-player games played
+   against each of his neighbors.
+   Payoffs are stored per edge, so the memory needed grows with the number of edges rather than
+   exponentially with the number of players as it does for the dense payoff tensor used by Game."""
+
+import numpy as np
+
+from .game import Game
+from .util import iterindices
+from .events import EventSource
+
+
+class PolymatrixGame(EventSource):
+    """ A class for a multi-player polymatrix (graphical) game."""
+
+    def __init__(self, action_counts, edges, verbose=False):
+        """Action_counts is a list with the number of actions of each player.
+           Edges is a dict, key is a tuple (player, other) and value is an np.array with shape
+           (action_counts[player], action_counts[other]), the payoffs to player for each combination of
+           his action and the other's action. An interaction where both players get something needs an entry
+           for (player, other) and (other, player)."""
+        self.verbose = verbose
+        self.action_counts = list(action_counts)
+        self.player_count = len(self.action_counts)
+        self.edges = {}
+        self._neighbors = [[] for ii in range(self.player_count)]
+        for (player, other), matrix in edges.items():
+            if type(matrix) != np.ndarray:
+                raise Exception('Edge payoffs must be numpy array')
+            if player == other:
+                raise Exception('A player can not be his own neighbor')
+            if matrix.shape != (self.action_counts[player], self.action_counts[other]):
+                raise Exception('Edge {} payoffs shape {} does not match the action counts'.format(
+                                (player, other), matrix.shape))
+            self.edges[(player, other)] = matrix
+            self._neighbors[player].append(other)
+        self._wiggle = 0.000001
+
+    def __repr__(self):
+        return 'action_counts {}\nedges {}'.format(self.action_counts, sorted(self.edges.keys()))
+
+    def num_actions(self, player):
+        """Return the number of availabel actions for the player with given index. Returns an int."""
+        return self.action_counts[player]
+
+    def num_players(self):
+        """Return the number of players for this game"""
+        return self.player_count
+
+    def neighbors(self, player):
+        """Return a list of the players whose actions affect the payoffs of the given player."""
+        return list(self._neighbors[player])
+
+    def eq(self, val1, val2):
+        """Check whether val1 and val2 are 'close enough' to count as equal."""
+        return val1 + self._wiggle > val2 and val2 + self._wiggle > val1
+
+    def gt(self, val1, val2):
+        """Check whether val1 > val2, giving ourselves a little 'wiggle room' for rounding errors."""
+        return val1 > val2 + self._wiggle
+
+    def _dense_profile(self, profile):
+        """Profiles may be given either as a list of lists of probabilities or as a list of lists of
+           [action, probability] pairs. Returns a list of np.arrays of probabilities."""
+        result = []
+        for player, player_profile in enumerate(profile):
+            player_profile = list(player_profile)
+            if player_profile and type(player_profile[0]) in (list, tuple):
+                dense = np.zeros(self.action_counts[player])
+                for action, prob in player_profile:
+                    dense[action] = float(prob)
+                result.append(dense)
+            else:
+                result.append(np.asarray(player_profile, dtype=float))
+        return result
+
+    def action_payoffs(self, player, profile):
+        """Find the expected payoff to player for each of his actions, given the profile of everyone
+           (the player's own entry is ignored). Only the player's edges are used. Returns an np.array."""
+        profile = self._dense_profile(profile)
+        payoffs = np.zeros(self.action_counts[player])
+        for other in self._neighbors[player]:
+            payoffs += self.edges[(player, other)] @ profile[other]
+        return payoffs
+
+    def get_profile_payoffs(self, profile):
+        """Find all player payoffs given the strategy profile. Returns a list of floats."""
+        profile = self._dense_profile(profile)
+        return [float(np.dot(self.action_payoffs(player, profile), profile[player]))
+                for player in range(self.player_count)]
+
+    def best_responses(self, profile):
+        """Find the best pure responses of each player to the others' strategies in profile.
+           Returns a list of lists of actions, one list per player."""
+        profile = self._dense_profile(profile)
+        result = []
+        for player in range(self.player_count):
+            utilities = self.action_payoffs(player, profile)
+            best = utilities.max()
+            result.append([action for action, utility in enumerate(utilities) if not self.gt(best, utility)])
+        return result
+
+    def is_nash(self, profile):
+        """Check if the supplied strategy profile is a nash equilibrium.
+           Profile is a list of lists, each list is strategy profile for one player.
+           Returns a boolean."""
+        profile = self._dense_profile(profile)
+        for player_profile in profile:
+            if player_profile.min() < 0:
+                raise Exception('negative probability')
+            if not self.eq(player_profile.sum(), 1):
+                raise Exception('probabilities do not sum to 1')
+        for player in range(self.player_count):
+            utilities = self.action_payoffs(player, profile)
+            best = utilities.max()
+            for action, prob in enumerate(profile[player]):
+                if prob > 0 and self.gt(best, utilities[action]):
+                    if self._subscribers:
+                        self._emit('nash_rejected', player=player, utilities=utilities)
+                    return False
+        return True
+
+    def _pure_action_payoffs(self, player, actions):
+        """Payoffs to player for each of his actions when the others play the pure actions given."""
+        payoffs = np.zeros(self.action_counts[player])
+        for other in self._neighbors[player]:
+            payoffs += self.edges[(player, other)][:, actions[other]]
+        return payoffs
+
+    def find_pure(self):
+        """Find any pure nash equilibria for this game. Yields tuples, one per equilibrium found,
+           each tuple is the actions for each player.
+           Players are assigned actions in order, and each player is checked as soon as he and all his
+           neighbors have actions, so branches which can't be equilibria are cut off early."""
+        # ready[depth] is the players who can be checked once players 0 to depth have actions
+        ready = [[] for ii in range(self.player_count)]
+        for player in range(self.player_count):
+            ready[max([player] + self._neighbors[player])].append(player)
+        actions = [0] * self.player_count
+
+        def assign(depth):
+            if depth == self.player_count:
+                yield tuple(actions)
+                return
+            for action in range(self.action_counts[depth]):
+                actions[depth] = action
+                ok = True
+                for player in ready[depth]:
+                    utilities = self._pure_action_payoffs(player, actions)
+                    if self.gt(utilities.max(), utilities[actions[player]]):
+                        ok = False
+                        break
+                if ok:
+                    yield from assign(depth + 1)
+
+        return assign(0)
+
+    def to_dense(self, max_cells=1000000):
+        """Build the equivalent Game with a dense payoff tensor. Only use this for small games."""
+        shape = list(self.action_counts)
+        cells = int(np.prod(shape)) * self.player_count
+        if cells > max_cells:
+            raise Exception('Dense payoffs would have {} elements, more than max_cells'.format(cells))
+        payoffs = np.zeros(tuple(shape + [self.player_count]), dtype=float)
+        for pos in iterindices(shape):
+            for player in range(self.player_count):
+                payoffs[pos + (player,)] = self._pure_action_payoffs(player, pos)[pos[player]]
+        return Game(payoffs)
+
+
+def polymatrix_from_bimatrix(num_players, pairs, payoffs):
+    """Factory method to create a polymatrix game where every pair of neighbors plays the same two-player game.
+       Pairs is a list of tuples (player, other), payoffs is a two-player payoff array like the one
+       for Game, player gets payoffs[..., 0] and other gets payoffs[..., 1]."""
+    payoffs = np.array(payoffs, dtype=float)
+    action_counts = [None] * num_players
+    edges = {}
+    for player, other in pairs:
+        for who, actions in ((player, payoffs.shape[0]), (other, payoffs.shape[1])):
+            if action_counts[who] is not None and action_counts[who] != actions:
+                raise Exception('Player {} has a different number of actions in different pairs'.format(who))
+            action_counts[who] = actions
+        edges[(player, other)] = edges.get((player, other), 0) + payoffs[..., 0]
+        edges[(other, player)] = edges.get((other, player), 0) + payoffs[..., 1].T
+    for player, actions in enumerate(action_counts):
+        if actions is None:
+            raise Exception('Player {} is not in any pair'.format(player))
+    return PolymatrixGame(action_counts, edges)
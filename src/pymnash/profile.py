@@ -0,0 +1,92 @@
+"""A strategy profile (a mixed strategy for every player) stored in a single flat numpy array.
+   Profiles are passed around in several formats: lists of lists of probabilities (is_nash), lists of
+   lists of [action, probability] pairs (get_profile_payoffs) and lists of dicts (find_all_equilibria).
+   A Profile can be created from and converted to any of them, and Game methods accept it directly."""
+
+import numpy as np
+
+
+class Profile(object):
+    """ A mixed strategy profile backed by one flat array of probabilities."""
+
+    def __init__(self, action_counts, probs=None):
+        """Action_counts is the number of actions of each player. Probs is a flat array with the probabilities
+           of player 0's actions, then player 1's and so on. It is used without copying if it is already a
+           float np.array. If probs is omitted all probabilities are zero."""
+        self.action_counts = tuple(int(count) for count in action_counts)
+        self.offsets = np.concatenate([[0], np.cumsum(self.action_counts)]).astype(int)
+        if probs is None:
+            probs = np.zeros(self.offsets[-1])
+        self.probs = np.asarray(probs, dtype=float)
+        if self.probs.shape != (self.offsets[-1],):
+            raise Exception('Probs must have one entry per action of every player')
+
+    def __repr__(self):
+        return 'Profile({})'.format(self.to_lists())
+
+    def __len__(self):
+        return len(self.action_counts)
+
+    def __getitem__(self, player):
+        """Return the probabilities of the player's actions, a view into probs (not a copy)."""
+        if player < 0:
+            player += len(self)
+        return self.probs[self.offsets[player]:self.offsets[player + 1]]
+
+    def __setitem__(self, player, probs):
+        self[player][:] = probs
+
+    def __iter__(self):
+        for player in range(len(self)):
+            yield self[player]
+
+    def copy(self):
+        return Profile(self.action_counts, self.probs.copy())
+
+    def support(self, player):
+        """Return a list of the actions the player plays with nonzero probability."""
+        return [int(action) for action in np.flatnonzero(self[player] > 0)]
+
+    def supports(self):
+        """Return the support of every player, a list of lists."""
+        return [self.support(player) for player in range(len(self))]
+
+    @classmethod
+    def from_lists(cls, profile):
+        """Create a profile from a list of lists of probabilities."""
+        action_counts = [len(player_profile) for player_profile in profile]
+        probs = np.concatenate([np.asarray(player_profile, dtype=float) for player_profile in profile])
+        return cls(action_counts, probs)
+
+    @classmethod
+    def from_pairs(cls, profile, action_counts):
+        """Create a profile from a list of lists of [action, probability] pairs."""
+        result = cls(action_counts)
+        for player, player_profile in enumerate(profile):
+            for action, prob in player_profile:
+                result[player][action] = float(prob)
+        return result
+
+    @classmethod
+    def from_dicts(cls, profile, action_counts):
+        """Create a profile from a list of dicts, keys are actions and values are probabilities.
+           The probabilities must be numbers, see Game.carnate_profile for symbolic ones."""
+        result = cls(action_counts)
+        for player, player_profile in enumerate(profile):
+            for action, prob in player_profile.items():
+                result[player][action] = float(prob)
+        return result
+
+    def to_lists(self):
+        """Return the profile as a list of lists of probabilities."""
+        return [[float(prob) for prob in self[player]] for player in range(len(self))]
+
+    def to_pairs(self):
+        """Return the profile as a list of lists of [action, probability] pairs for the actions in the support."""
+        return [[[action, float(self[player][action])] for action in self.support(player)]
+                for player in range(len(self))]
+
+    def to_dicts(self):
+        """Return the profile as a list of dicts for the actions in the support."""
+        return [{action: float(self[player][action]) for action in self.support(player)}
+                for player in range(len(self))]
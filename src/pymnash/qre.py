@@ -0,0 +1,152 @@
+"""Tracing the logit quantal response equilibrium (QRE) path.
+   In a logit QRE with precision lambda each player plays each action with probability proportional to
+   exp(lambda * its expected payoff). At lambda = 0 everyone plays uniformly, and as lambda grows the QRE follows a
+   curve which (for almost every game) ends at a nash equilibrium. Unlike the nash conditions the QRE equations
+   always have a solution, so the curve can be followed from the uniform profile with small steps.
+   Following Turocy the unknowns are the logs of the probabilities y and lambda, and the equations are
+   y[i, j] - y[i, 0] = lambda * (u[i, j] - u[i, 0]) and sum(exp(y[i])) = 1 for each player i. The curve is followed
+   by arc length, so it doesn't matter if lambda turns back for a while."""
+
+import numpy as np
+
+from .control import stop_reason
+from .learning import epsilons
+from .numeric import split
+
+
+def cross_utilities(payoffs, mixes):
+    """Return a dict with an entry for each ordered pair of different players (i, k), an np.array of shape
+       (actions of i, actions of k) holding i's expected payoff when i plays the row, k plays the column and the
+       others play their mixes."""
+    num_players = len(mixes)
+    result = {}
+    for player in range(num_players):
+        for other in range(num_players):
+            if other == player:
+                continue
+            operands = [payoffs[..., player], list(range(num_players))]
+            for third in range(num_players):
+                if third not in (player, other):
+                    operands += [mixes[third], [third]]
+            result[player, other] = np.einsum(*operands, [player, other], optimize='greedy')
+    return result
+
+def _first_other(player):
+    return 1 if player == 0 else 0
+
+def equations(payoffs, point, sizes, cross=None):
+    """The QRE equations at point (all the players' log probabilities, then lambda), as one np.array."""
+    lam = point[-1]
+    logs = split(point[:-1], sizes)
+    mixes = [np.exp(player_logs) for player_logs in logs]
+    if cross is None:
+        cross = cross_utilities(payoffs, mixes)
+    result = []
+    for player, player_logs in enumerate(logs):
+        other = _first_other(player)
+        utilities = cross[player, other] @ mixes[other]
+        result.append(player_logs[1:] - player_logs[0] - lam * (utilities[1:] - utilities[0]))
+        result.append([mixes[player].sum() - 1])
+    return np.concatenate(result)
+
+def jacobian(payoffs, point, sizes, cross=None):
+    """The jacobian of equations with respect to point, shape (equations, len(point))."""
+    lam = point[-1]
+    logs = split(point[:-1], sizes)
+    mixes = [np.exp(player_logs) for player_logs in logs]
+    if cross is None:
+        cross = cross_utilities(payoffs, mixes)
+    offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(int)
+    result = np.zeros((offsets[-1], offsets[-1] + 1))
+    for player, size in enumerate(sizes):
+        rows = slice(offsets[player], offsets[player + 1] - 1)
+        result[rows, offsets[player] + 1:offsets[player + 1]] = np.eye(size - 1)
+        result[rows, offsets[player]] = -1
+        for other, other_size in enumerate(sizes):
+            if other == player:
+                continue
+            differences = cross[player, other][1:] - cross[player, other][:1]
+            # the chain rule through mix = exp(log)
+            result[rows, offsets[other]:offsets[other + 1]] = -lam * differences * mixes[other]
+        utilities = cross[player, _first_other(player)] @ mixes[_first_other(player)]
+        result[rows, -1] = -(utilities[1:] - utilities[0])
+        result[offsets[player + 1] - 1, offsets[player]:offsets[player + 1]] = mixes[player]
+    return result
+
+def _tangent(matrix):
+    """A unit vector along the curve, the null vector of the jacobian."""
+    return np.linalg.svd(matrix)[2][-1]
+
+def _correct(payoffs, point, sizes, tolerance, max_iterations):
+    """Newton's method from point back onto the curve, taking the smallest step each time (the pseudo inverse
+       of the jacobian). Returns (point, iterations) or (None, max_iterations)."""
+    for iteration in range(max_iterations):
+        mixes = [np.exp(player_logs) for player_logs in split(point[:-1], sizes)]
+        cross = cross_utilities(payoffs, mixes)
+        residuals = equations(payoffs, point, sizes, cross)
+        if not np.isfinite(residuals).all():
+            return None, max_iterations
+        if np.abs(residuals).max() <= tolerance * (1 + abs(point[-1])):
+            return point, iteration
+        point = point - np.linalg.lstsq(jacobian(payoffs, point, sizes, cross), residuals, rcond=None)[0]
+    return None, max_iterations
+
+def trace(payoffs, epsilon=1e-4, max_lambda=1e7, step=0.1, min_step=1e-10, max_steps=10000, tolerance=1e-10,
+          corrector_iterations=6, deadline=None, cancel=None, progress=None):
+    """Follow the logit QRE curve from lambda = 0 until the profile is within epsilon of a nash equilibrium (no
+       player can gain more than epsilon by changing strategy), lambda passes max_lambda or max_steps steps have
+       been taken. Payoffs is an np.array of numbers, shape actions + (players,).
+       Each step predicts along the tangent (starting with arc length step) and corrects back onto the curve.
+       The step doubles after an easy correction and halves after a failed one, so it grows quickly where the
+       curve is straight, as it is for large lambda. Deadline and cancel are as for Game.find_all_equilibria,
+       progress is called as progress(log(1 + lambda) / log(1 + max_lambda), epsilon) after each step.
+       Returns a dict with the final mixes (a list of np.arrays), lambda, epsilon, the path (a list of dicts
+       with lambda, mixes and epsilon for each step), the steps taken and the status ('converged', 'max_lambda',
+       'max_steps', 'deadline', 'cancelled' or 'failed' if the step size fell below min_step)."""
+    payoffs = np.asarray(payoffs, dtype=float)
+    sizes = list(payoffs.shape[:-1])
+    point = np.concatenate([np.full(size, -np.log(size)) for size in sizes] + [[0.0]])
+    tangent = _tangent(jacobian(payoffs, point, sizes))
+    if tangent[-1] < 0:
+        tangent = -tangent
+    path = [_path_point(payoffs, point, sizes)]
+    status = 'max_steps'
+    steps = 0
+    while steps < max_steps:
+        reason = stop_reason(deadline, cancel)
+        if reason is not None:
+            status = reason
+            break
+        corrected, iterations = _correct(payoffs, point + step * tangent, sizes, tolerance, corrector_iterations)
+        if corrected is not None:
+            new_tangent = _tangent(jacobian(payoffs, corrected, sizes))
+            if new_tangent @ tangent < 0:
+                new_tangent = -new_tangent
+        if corrected is None or new_tangent @ tangent < 0.9: # a sharp turn may mean another branch was reached
+            step /= 2
+            if step < min_step:
+                status = 'failed'
+                break
+            continue
+        point, tangent = corrected, new_tangent
+        steps += 1
+        if iterations <= 2:
+            step *= 2
+        path.append(_path_point(payoffs, point, sizes))
+        if progress is not None:
+            progress(min(1.0, np.log1p(max(point[-1], 0)) / np.log1p(max_lambda)), path[-1]['epsilon'])
+        if path[-1]['epsilon'] <= epsilon:
+            status = 'converged'
+            break
+        if point[-1] >= max_lambda:
+            status = 'max_lambda'
+            break
+    final = path[-1]
+    return {'mixes': final['mixes'], 'lambda': final['lambda'], 'epsilon': final['epsilon'], 'path': path,
+            'steps': steps, 'status': status}
+
+def _path_point(payoffs, point, sizes):
+    mixes = [np.exp(player_logs) for player_logs in split(point[:-1], sizes)]
+    mixes = [mix / mix.sum() for mix in mixes]
+    return {'lambda': float(point[-1]), 'mixes': mixes,
+            'epsilon': float(epsilons(payoffs, [mix[None] for mix in mixes])[0])}
@@ -5,8 +5,9 @@
 import numpy as np
 
 from pymnash.game import Game
-from pymnash.util import coords_from_pos, iterindices, enumershape, zero_sum_dict, payout_array_from_dict
-from collections import defaultdict
+from pymnash.anonymous_game import anonymous_game_from_function
+from pymnash.lazy_payoffs import LazyPayoffs
+from pymnash.util import zero_sum_dict, payout_array_from_dict
 
 
 def battle_of_genders(n):
@@ -17,41 +18,49 @@ def battle_of_genders(n):
     # We know there is one pure strategy per player, with all players playing that player's favorite.
     # There will also be one mixed  strategy for ever combination of pure strategies
     boga = np.zeros(tuple([n] * (n + 1)), dtype=float)
-    #print(boga)
-    for ii in range(n):
-        loc = boga
-        for jj in range(n):
-            loc = loc[ii]
-        for kk in range(n):
-            if kk == ii:
-                loc[kk] = n
-            else:
-                 loc[kk] = 1
+    everyone = (np.arange(n),) * n # the cells where all players pick the same action
+    boga[everyone] = 1
+    boga[everyone + (np.arange(n),)] = n
     return Game(boga)
 
-def detente_of_genders(n, m):
+def detente_of_genders(n, m, anonymous=False, lazy=False):
     """Similar to battle of genders, there are n plyers total with m types of players
        (and m actions per player)
        Instead of requiring all players to coordinate, the score for all players choosing the same action
        is 2 * (c -1) if it is their preferred action and (c -1) if it is not (so any player
-       choosing a unique action scores zero)."""
-    shape = [m] * n # n players, m moves per player
-    shape.append(n) # n player payoffs
-    payoffs = np.zeros(tuple(shape), dtype=float)
-    for pos in iterindices(shape[:-1]):
-        counts = [0] * m
-        for pospos in pos:
-            counts[pospos] +=1
-        for ii in range(n):
-            type_ = int(ii/m)
-            action = pos[ii]
-            action_score = counts[action] - 1
+       choosing a unique action scores zero).
+       If anonymous is True, return an AnonymousGame instead of a Game.
+       If lazy is True, payoffs are only calculated for the action profiles which are used."""
+    if anonymous:
+        def payoff(type_, action, counts):
+            action_score = counts[action]
             if action == type_:
                 action_score *= 2
-            there = list(pos)
-            there.append(ii)
-            payoffs[tuple(there)] = action_score
-    return Game(payoffs)
+            return action_score
+        return anonymous_game_from_function(n, m, payoff, [int(ii/m) for ii in range(n)])
+    if lazy:
+        return Game(LazyPayoffs(None, [m] * n, batch_fun=lambda cells: _detente_of_genders_cells(n, m, cells)))
+    shape = [m] * n # n players, m moves per player
+    payoffs = _detente_of_genders_cells(n, m, _all_cells(shape))
+    return Game(payoffs.reshape(tuple(shape + [n])))
+
+def _all_cells(shape):
+    """Return every action profile for the given action shape as an array with one row per profile,
+       in the same order as the cells of a payoffs array."""
+    return np.indices(shape).reshape(len(shape), -1).T
+
+def _player_actions(shape):
+    """Return an array with shape shape + (players,), the action of each player in each cell."""
+    return np.moveaxis(np.indices(shape), 0, -1)
+
+def _detente_of_genders_cells(n, m, cells):
+    """Payoffs for detente_of_genders for each row of cells (an array of action profiles)."""
+    rows = np.arange(len(cells))[:, None]
+    counts = np.zeros((len(cells), m), dtype=int)
+    np.add.at(counts, (rows, cells), 1)
+    scores = counts[rows, cells] - 1.0
+    types = np.arange(n) // m
+    return np.where(cells == types, 2 * scores, scores)
 
 def reducible(n):
     """A game just to test the iterated elimination of strictly dominated strategies. """
@@ -60,14 +69,10 @@ def reducible(n):
     twoplayer = [[[4,3], [5,1], [6,2]],
                  [[2,1], [8,4], [3,6]],
                  [[3,0], [9,6], [2,8]]]
-    thetuple = tuple([3, 3] + [2] * (n - 2) +  [n])
-    payoffs = np.zeros(thetuple)
-    for indices in iterindices(payoffs.shape):
-        player = indices[len(indices) - 1]
-        if player in [0, 1]:
-             payoffs[indices] = twoplayer[indices[0]][indices[1]][player]
-        elif indices[player] == 0:
-             payoffs[indices] = 1
+    shape = [3, 3] + [2] * (n - 2)
+    # the other players get 1 for action 0 and 0 for action 1, whatever anyone else does
+    payoffs = (_player_actions(shape) == 0).astype(float)
+    payoffs[..., :2] = np.array(twoplayer, dtype=float).reshape([3, 3] + [1] * (n - 2) + [2])
     return Game(payoffs)
 
 def combo_reducible(n):
@@ -84,54 +89,53 @@ def combo_reducible(n):
 
 
 
-def dunderheads(n):
+def dunderheads(n, anonymous=False):
     """Multi-player High-Low. Similar to battle of genders, except there are only two options and all players
-        have the same preferrred option."""
+        have the same preferrred option.
+        If anonymous is True, return an AnonymousGame instead of a Game."""
     # There are two pure nash equilibria, the 'smart' one where everyone picks the preferred option, and the
     # 'dunderheaded' one where everyone picks the option they don't like.
     # There should also be 'super-dunderheaded' solutions where all player mix their picks.
     # The probability of picking the dunderheaded option will be higher, so the higher chance of getting a match
     # exactly compensates for the lower payoff.
+    if anonymous:
+        def payoff(type_, action, counts):
+            if counts[1 - action] > 0:
+                return 0.0
+            return 3.0 if action == 0 else 1.0
+        return anonymous_game_from_function(n, 2, payoff)
     payoffs = np.zeros(tuple([2] * n + [n]), dtype=float)
-    for indices in iterindices(payoffs.shape):
-        good = True # everyone is playing the good choice
-        bad = True
-        for ii in range(len(indices) - 1):
-            if indices[ii] == 1: #someone is playing the bad choice
-                good = False
-            elif indices[ii] == 0:
-                bad = False
-        if good:
-            payoffs[indices] = 3.0
-        if bad:
-            payoffs[indices] = 1.0
+    payoffs[(0,) * n] = 3.0 # everyone is playing the good choice
+    payoffs[(1,) * n] = 1.0
     return Game(payoffs)
 
 
 
-def prisoners_dilemma(n):
+def prisoners_dilemma(n, anonymous=False):
     """For the multiplayer prisoner's dilemma we will say if everone cooperates then each person gets a -1 payoff.
        If exactly one player defectes he gets 0 and everyone else gets -5.
        If multiple player defect, the ones that defect get -3 and the ones that cooperate get -5.
+       If anonymous is True, return an AnonymousGame instead of a Game.
     """
     # We will say for ever player choice '0' is cooperate and '1' is defect.
     # The innermost array is player id for payoffs
     # We know the only nash equilibrium is everybody defects.
-    payoffs = np.zeros(tuple(([2] * n + [n])), dtype=float)
-    for ii in range(np.prod(payoffs.shape)):
-        coords = coords_from_pos(payoffs, ii)
-        player = coords[ n ] # index of the player we are looking at
-        he_defected = bool(coords[player])
-        total_defected = sum(coords[:-1])
-        if total_defected == 0:
-            payoffs[coords] = -1
-        elif he_defected and total_defected  == 1:
-            payoffs[coords] = 0
-        elif he_defected:
-             payoffs[coords] = -3
-        else:
-             payoffs[coords] = -5
-    return Game(payoffs, prisoner_labels)
+    if anonymous:
+        def payoff(type_, action, counts):
+            total_defected = counts[1] + action
+            if total_defected == 0:
+                return -1
+            if action == 1 and total_defected == 1:
+                return 0
+            if action == 1:
+                return -3
+            return -5
+        return anonymous_game_from_function(n, 2, payoff)
+    defected = _player_actions([2] * n) == 1
+    total_defected = defected.sum(axis=-1, keepdims=True)
+    payoffs = np.where(defected, np.where(total_defected == 1, 0.0, -3.0), -5.0)
+    payoffs[(0,) * n] = -1
+    return Game(payoffs)
 
 
 def matching_pennies(n):
@@ -144,42 +148,31 @@ def matching_pennies(n):
     # play randomly, the other player can play anything and it's still an equilibrium.
     # As long as at least one player is playing randomly it doesn't really matter what the
     # other players do, but just one player randomising would not be an equilibrium.
-    payoffs = np.zeros(tuple([n] * (n + 1)), dtype=float)
-    for ii in range(np.prod(payoffs.shape)):
-        coords = coords_from_pos(payoffs, ii)
-        player = coords[ n ] # index of the player we are looking at
-        sum_played = sum(coords[:-1])
-        if sum_played % n == player:
-            payoffs[coords] = n - 1
-        else:
-            payoffs[coords] = -1
-    #print(payoffs)
+    sum_played = np.indices([n] * n).sum(axis=0)[..., None]
+    payoffs = np.where(sum_played % n == np.arange(n), n - 1.0, -1.0)
     return Game(payoffs)
 
-def how_low_dare_you_go(n, m):
+def how_low_dare_you_go(n, m, lazy=False):
     """n players have m choices of numbers, m > n. The winning player is the player who picks
-       the lowest non-negative integer not chosen by any other player."""
+       the lowest non-negative integer not chosen by any other player.
+       If lazy is True, payoffs are only calculated for the action profiles which are used."""
     # we will restrict the game to m choices so we have a hope of finding solutions.
     # In principle this game could be played with an infinite number of possible
     # moves, nobody igoing to play a number all that much higher than the number of players in any case.
-    payoffs = np.zeros(tuple(([m] * n + [n])), dtype=float)
-    for jj, coords in enumershape(payoffs.shape[:-1]):
-        counts = defaultdict(int) # number of players picking this number
-        win = None
-        for iii in range(len(coords)):
-            counts[coords[iii]] += 1
-        for ii in sorted(counts.keys()):
-            if counts[ii] == 1:
-                win = ii
-                break
-        if win is not None:
-            done = False
-            for player_index in range(len(coords)):
-                if coords[player_index] == win:
-                    pos = list(coords)
-                    pos.append(player_index)
-                    payoffs[tuple(pos)] = 1
-    return Game(payoffs)
+    if lazy:
+        return Game(LazyPayoffs(None, [m] * n, batch_fun=lambda cells: _how_low_dare_you_go_cells(m, cells)))
+    payoffs = _how_low_dare_you_go_cells(m, _all_cells([m] * n))
+    return Game(payoffs.reshape(tuple([m] * n + [n])))
+
+def _how_low_dare_you_go_cells(m, cells):
+    """Payoffs for how_low_dare_you_go for each row of cells (an array of action profiles)."""
+    rows = np.arange(len(cells))[:, None]
+    counts = np.zeros((len(cells), m), dtype=int)
+    np.add.at(counts, (rows, cells), 1)
+    unique = counts == 1
+    win = np.argmax(unique, axis=1) # lowest number picked by exactly one player
+    has_win = unique.any(axis=1)
+    return ((cells == win[:, None]) & has_win[:, None]).astype(float)
 
 def mixed_dom(n, m):
     """A two-player game where one player has a dominated strategy, but it takes a combination of
@@ -190,89 +183,81 @@ def mixed_dom(n, m):
     if n != 2:
         raise ValueError("This game is only supported for 2 players")
     payoffs = np.zeros(tuple((m + 1, m, 2)), dtype=float)
-    for ii in range(m):
-        payoffs[ii][ii][0] = m + 1
-        payoffs[ii][ii][1] = -1 * (m + 1)
-        payoffs[m][ii][0] = 1
-        payoffs[m][ii][1] = -1
+    diagonal = np.arange(m)
+    payoffs[diagonal, diagonal] = [m + 1, -1 * (m + 1)]
+    payoffs[m] = [1, -1]
     return Game(payoffs)
 
-def chicken(n):
+def chicken(n, anonymous=False, win=5, crash=-10):
     """For this variation of multi-player cheicken, each player has 2 possible actions
        (0 = chicken, 1 = hawk).  If everyne is a chicken, everyone scores 0.
-       If there is just one hawk, he gets 5 points and the chickens each lose 1.
-       If there is more than 1 hawk, they each score -10 and the chickens get zero.
+       If there is just one hawk, he gets win (5) points and the chickens each lose 1.
+       If there is more than 1 hawk, they each score crash (-10) and the chickens get zero.
+       win and crash may be sympy symbols, see Game.find_parametric_equilibria.
+       If anonymous is True, return an AnonymousGame instead of a Game.
     """
-    payoffs = np.zeros(tuple([2] * n + [n]), dtype=float)
-    shape = payoffs.shape[:-1]
-    for pos in iterindices(shape):
-        hawks = 0
-        for ii in range(len(shape)):
-            if pos[ii] == 1:
-                hawks += 1
-        for ii in range(n):
-            where = tuple(list(pos) + [ii])
+    if anonymous:
+        def payoff(type_, action, counts):
+            hawks = counts[1] + action
             if hawks == 1:
-                if pos[ii] == 1:
-                    payoffs[where] = 5
-                else:
-                    payoffs[where] = -1
-            elif hawks > 1:
-                if pos[ii] == 1:
-                    payoffs[where] = -10
+                return win if action == 1 else -1
+            if hawks > 1 and action == 1:
+                return crash
+            return 0
+        return anonymous_game_from_function(n, 2, payoff)
+    hawk = _player_actions([2] * n) == 1
+    hawks = hawk.sum(axis=-1, keepdims=True)
+    payoffs = np.where(hawks == 1, np.where(hawk, win, -1.0), np.where(hawk & (hawks > 1), crash, 0.0))
     return Game(payoffs)
 
-def stag_hunt(n, m):
+def stag_hunt(n, m, anonymous=False, stag=None):
     """Each player has 2 options, 0 = hunt the stag, 1 = chase rabbits.
        We need a critical number m of stag hunters to catch the stag.
        If an insufficient number goes after the stag, they get 0
-       If a sufficient number go after the stag, they share the value which I will say is 4 * n.
+       If a sufficient number go after the stag, they share the value of the stag, 4 * n unless given.
+       stag may be a sympy symbol, see Game.find_parametric_equilibria.
+       If anonymous is True, return an AnonymousGame instead of a Game.
     """
-    payoffs = np.zeros(tuple([2] * n + [n]), dtype=float)
-    shape = payoffs.shape[:-1]
-    for pos in iterindices(shape):
-        hunters = 0
-        for ii in range(len(shape)):
-            if pos[ii] == 1:
-                hunters += 1
-        for ii in range(n):
-            where = tuple(list(pos) + [ii])
-            if pos[ii] == 0:
-                payoffs[where] = 1
-            else:
-                if hunters >= m:
-                    payoffs[where] = 4 * n / hunters
+    if stag is None:
+        stag = 4 * n
+    if anonymous:
+        def payoff(type_, action, counts):
+            if action == 0:
+                return 1
+            hunters = counts[1] + 1
+            if hunters >= m:
+                return stag / hunters
+            return 0
+        return anonymous_game_from_function(n, 2, payoff)
+    hunter = _player_actions([2] * n) == 1
+    hunters = hunter.sum(axis=-1, keepdims=True)
+    share = np.where(hunters >= m, stag / np.maximum(hunters, 1), 0.0)
+    payoffs = np.where(hunter, share, 1.0)
     return Game(payoffs)
 
-def all_pay_auction(n, m):
+def all_pay_auction(n, m, lazy=False, prize=None):
     """In this discrete version of all_pay_auction, each of n players can bid an integer amount
        from 0 to m. The prize is split between all players who bid the maximum.
        The prize must be more than the maximum bid for one player and less than the total
-       bid to keep the game interesting, I will make it 1.5 * m for 2 players and 2 * m for more"""
-    if n == 2:
+       bid to keep the game interesting, I will make it 1.5 * m for 2 players and 2 * m for more
+       unless prize is given. prize may be a sympy symbol, see Game.find_parametric_equilibria.
+       If lazy is True, payoffs are only calculated for the action profiles which are used."""
+    if prize is None and n == 2:
         prize = 1.5 * m
-    else:
+    elif prize is None:
         prize = 2 * m
-    payoffs = np.zeros(tuple([m + 1] * n + [n]), dtype=float)
-    shape = payoffs.shape[:-1]
-    for  pos in iterindices(shape):
-        max_bid = None
-        for ii, elm in enumerate(pos):
-            if max_bid is None or elm > max_bid:
-                max_bid = elm
-                winners = [ii]
-            elif elm == max_bid:
-                winners.append(ii)
-        lol = 'nope'
-        for ii in range(n):
-            where = list(pos)
-            where.append(ii)
-            if ii in winners:
-                payoffs[tuple(where)] = prize / len(winners) - where[ii]
-            else:
-                payoffs[tuple(where)] = -where[ii]
+    if lazy:
+        return Game(LazyPayoffs(None, [m + 1] * n, batch_fun=lambda cells: _all_pay_auction_cells(prize, cells)))
+    payoffs = _all_pay_auction_cells(prize, _player_actions([m + 1] * n))
     return Game(payoffs)
 
+def _all_pay_auction_cells(prize, cells):
+    """Payoffs for all_pay_auction for each row of cells (an array of action profiles, the bids
+       are along the last axis)."""
+    winners = cells == cells.max(axis=-1, keepdims=True)
+    shares = prize / winners.sum(axis=-1, keepdims=True)
+    return np.where(winners, shares, 0.0) - cells
+
 
 __all__ = ['battle_of_genders', 'detente_of_genders', 'reducible', 'combo_reducible', 
            'dunderheads', 'prisoners_dilemma',
@@ -0,0 +1,71 @@
+"""Closed form solutions of two player games where one player has just two actions (2 x 2 and 2 x N games).
+   If the row player plays action 0 with probability p, the column player's payoff from each of his actions is a
+   line in p, and his best responses are the lines on the upper envelope. In a nondegenerate game the mixed
+   equilibria are at the breakpoints of the envelope, where the column player mixes the two lines which cross
+   there so that the row player is indifferent."""
+
+import numpy as np
+
+
+def solve_2xn(payoffs, wiggle=1e-6):
+    """Payoffs is an np.array of shape (2, N, 2) or (N, 2, 2).
+       Returns all the nash equilibria as a list of lists of dicts, like find_all_equilibria, with float
+       probabilities. Returns None if the game is degenerate (a player has more best responses than the number
+       of actions he plays) as the equilibria may then form a continuum, which needs the general solver."""
+    if payoffs.shape[0] != 2:
+        # make the player with two actions the row player, and swap back at the end
+        result = solve_2xn(np.swapaxes(payoffs, 0, 1)[..., ::-1], wiggle)
+        if result is None:
+            return None
+        return [equilibrium[::-1] for equilibrium in result]
+    row_payoffs = payoffs[..., 0]
+    column_payoffs = payoffs[..., 1]
+    gains = row_payoffs[0] - row_payoffs[1] # the row player's gain from action 0 against each column
+    if (np.abs(gains) <= wiggle).any():
+        return None
+    result = []
+    for row in range(2):
+        best = column_payoffs[row].max()
+        if (column_payoffs[row] >= best - wiggle).sum() > 1:
+            return None
+        column = int(np.argmax(column_payoffs[row]))
+        if row_payoffs[row, column] > row_payoffs[1 - row, column]:
+            result.append([{row: 1}, {column: 1}])
+    breakpoints = upper_envelope(column_payoffs[0] - column_payoffs[1], column_payoffs[1], wiggle)
+    if breakpoints is None:
+        return None
+    for prob, column, other in breakpoints:
+        # mix column and other so the row player is indifferent
+        if abs(gains[other] - gains[column]) <= wiggle:
+            continue # no mix of the two makes him indifferent
+        column_prob = gains[other] / (gains[other] - gains[column])
+        if column_prob <= wiggle or column_prob >= 1 - wiggle:
+            continue
+        column_mix = {column: float(column_prob), other: float(1 - column_prob)}
+        result.append([{0: float(prob), 1: float(1 - prob)},
+                       {action: column_mix[action] for action in sorted(column_mix)}])
+    return result
+
+def upper_envelope(slopes, intercepts, wiggle=1e-6):
+    """Walk the upper envelope of the lines intercepts[j] + p * slopes[j] from p = 0 to p = 1.
+       Returns a list of (p, line, next_line) for each breakpoint strictly between 0 and 1, or None if three
+       lines meet at a breakpoint (a degenerate game)."""
+    current = int(np.argmax(intercepts))
+    position = 0.0
+    result = []
+    while True:
+        steeper = slopes > slopes[current] + wiggle
+        if not steeper.any():
+            return result
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossings = np.where(steeper, (intercepts[current] - intercepts) / (slopes - slopes[current]), np.inf)
+        crossings[crossings <= position + wiggle] = np.inf
+        crossing = crossings.min()
+        if crossing >= 1 - wiggle:
+            return result
+        if (crossings <= crossing + wiggle).sum() > 1:
+            return None
+        following = int(np.argmin(crossings))
+        result.append((float(crossing), current, following))
+        current = following
+        position = crossing
@@ -0,0 +1,54 @@
+"""Counters and timers for the equilibrium solver.
+   Collecting stats is opt-in: Game.stats is None unless a SolverStats is attached, and the solver only
+   records anything when it is set, so a game without stats pays just a None check per stage."""
+
+from time import perf_counter
+
+
+class SolverStats(object):
+    """ Counts of events and cumulative wall time per stage of a solve."""
+
+    # counters, in the order they are reported
+    counter_names = ['supports_enumerated', # supports considered by find_all_equilibria
+                     'supports_pruned', # supports skipped because a symmetric support is solved instead
+                     'supports_solved', # supports passed to find_support_equilibria
+                     'sympy_calls', # calls to sympy solve
+                     'sympy_failures', # sympy solve raised an exception
+                     'sympy_timeouts', # sympy solve took longer than the support timeout
+                     'no_solutions', # sympy found no solutions
+                     'out_of_bounds', # solutions rejected for a probability outside (0, 1]
+                     'dominance_rejections', # solutions rejected because some player can do better
+                     'solutions_found', # equilibria found, before permuting by symmetry
+                     'closed_form_solves', # 2 x N games solved by solve_2xn
+                     'equilibria_tracked', # previous equilibria followed by track_equilibria
+                     'tracking_failures'] # previous equilibria track_equilibria lost
+    # timed stages
+    stage_names = ['build_equations', # constructing the indifference equations in _get_indifference_probs
+                   'sympy_solve',
+                   'carnate_profile',
+                   'is_dominated']
+
+    def __init__(self):
+        self.reset()
+
+    def __repr__(self):
+        return 'SolverStats {}'.format(self.as_dict())
+
+    def reset(self):
+        """Set all counters and timers back to zero."""
+        self.counts = {name: 0 for name in self.counter_names}
+        self.seconds = {name: 0.0 for name in self.stage_names}
+
+    def count(self, name, number=1):
+        self.counts[name] = self.counts.get(name, 0) + number
+
+    def add_time(self, name, start):
+        """Add the time since start (a perf_counter value) to the stage."""
+        self.seconds[name] = self.seconds.get(name, 0.0) + perf_counter() - start
+
+    def as_dict(self):
+        """Return the counters and the seconds spent in each stage (keys are the stage name + '_seconds')."""
+        result = dict(self.counts)
+        for name, seconds in self.seconds.items():
+            result[name + '_seconds'] = seconds
+        return result
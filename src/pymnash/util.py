@@ -141,6 +141,35 @@ def iter_subset_combos(actions):
         # print('oldpos', oldpos, 'prob', prob)
         yield sslist
         
+def compositions(total, parts):
+    """Generate all tuples of parts non-negative ints which sum to total, in lexicographic order."""
+    if parts == 1:
+        yield (total,)
+        return
+    for first in range(total + 1):
+        for rest in compositions(total - first, parts - 1):
+            yield (first,) + rest
+
+def permute_support(support, perm):
+    """Move the entry for player ii of support (a list with one element per player) to position perm[ii].
+       Returns a new list."""
+    result = [None] * len(support)
+    for ii, elm in enumerate(support):
+        result[perm[ii]] = elm
+    return result
+
+def contract_payoffs(payoffs, mixes, skip=None):
+    """Find expected payoffs by contracting the player axes of payoffs (an np.array shaped like a game's
+       payoffs) with the probability arrays in mixes, one per player. The axis of player skip, if given,
+       is left in place. Returns an np.array, shape (players,) or (actions of skip, players)."""
+    result = payoffs
+    # contract from the last player axis so the remaining axes keep their positions
+    for player in reversed(range(len(mixes))):
+        if player == skip:
+            continue
+        result = numpy.tensordot(result, mixes[player], axes=([player], [0]))
+    return result
+
 def is_pure(profile):
     """Is the profile (list of lists) pure (each player is playing exactly one stratgy)? Returns a boolean."""
     for elm in profile:
@@ -1,8 +1,10 @@
 #!/usr/bin/env python
+import time
 from argparse import ArgumentParser
 from ast import literal_eval
 from pymnash.patrik import Patrik, describe_key
 from pymnash.node import Node
+from pymnash.events import EventLog
 
 if __name__ == '__main__':
     parser = ArgumentParser()
@@ -13,8 +15,14 @@ if __name__ == '__main__':
     parser.add_argument("--solve", help="solve from node", action="store_true")
     parser.add_argument("--count", help="count total number of nodes", action="store_true")
     parser.add_argument("--verbose", help="verbose", action="store_true")
+    parser.add_argument("--time-limit", type=float, help="stop solving after this many seconds", dest="time_limit")
+    parser.add_argument("--progress", help="show progress while solving", action="store_true")
+    parser.add_argument("--trace", help="write solver events to this file, one JSON object per line")
     args = parser.parse_args()
     thegame = Patrik(verbose=args.verbose)
+    if args.trace:
+        trace = EventLog(args.trace)
+        thegame.subscribe(trace)
     # print("nodes", thegame.nodes)
 
     if args.count:
@@ -40,8 +48,19 @@ if __name__ == '__main__':
         didit = thegame.set_scores(node)
 
     if args.solve:
-        thegame.set_subscores(node)
+        deadline = None
+        if args.time_limit is not None:
+            deadline = time.time() + args.time_limit
+        progress = None
+        if args.progress:
+            progress = lambda fraction, scored: print("progress {:.1%} nodes scored {}".format(fraction, scored))
+        thegame.set_subscores(node, deadline=deadline, progress=progress)
+        print("status", thegame.solve_status)
+    if args.trace:
+        trace.close()
 
 
 
 # ./test_patrik.py --node (2, 2, 1, False, 3)" --score
+# ./test_patrik.py --node "(0, 1, 1, False, 1)" --solve --trace patrik_events.jsonl
+# ./test_patrik.py --solve --time-limit 60 --progress
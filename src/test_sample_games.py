@@ -4,8 +4,13 @@
 
 from collections import defaultdict
 import argparse
+import time
+
+import numpy as np
 
 from pymnash.sample_games import *
+from pymnash.stats import SolverStats
+from pymnash.events import EventLog
 
 game_names = {"battle_of_genders":battle_of_genders, "reducible":reducible, "combo_reducible":combo_reducible,
                "dunderheads":dunderheads, "prisoners_dilemma":prisoners_dilemma, "matching_pennies":matching_pennies,
@@ -15,6 +20,13 @@ game_names = {"battle_of_genders":battle_of_genders, "reducible":reducible, "com
 m_games = [how_low_dare_you_go, mixed_dom, stag_hunt, detente_of_genders, all_pay_auction,
           ]
 
+anonymous_games = [dunderheads, prisoners_dilemma, chicken, stag_hunt, detente_of_genders]
+
+lazy_games = [how_low_dare_you_go, detente_of_genders, all_pay_auction]
+
+# payoff parameters which can be swept with --sweep
+parametric_games = {chicken: ['win', 'crash'], stag_hunt: ['stag'], all_pay_auction: ['prize']}
+
 
 def get_game_fun(name):
     """Find the factory function based on the game name"""
@@ -61,18 +73,90 @@ if __name__ == '__main__':
     parser.add_argument('--profile', help='test if profile is equilibrium')
     parser.add_argument('--canned', help='test if canned profile is equilibrium', action='store_true')
     parser.add_argument('--verbose', action='store_true')
+    parser.add_argument('--anonymous', action='store_true',
+                        help='create an AnonymousGame (payoffs stored by action counts, no dense payoff tensor)')
     parser.add_argument('--iesds', action='store_true')
     parser.add_argument('--combo', action='store_true', help='check if a combo of strategies dominates a strategy')
     parser.add_argument('--support', help='try to find nash equilibria with the given support', default = None)
     parser.add_argument('--all', help='try to find all nash equilibria for this game', action='store_true')
+    parser.add_argument('--symmetries', help='show player permutations which leave the game unchanged',
+                        action='store_true')
+    parser.add_argument('--no-symmetry', help='do not use symmetries when finding all equilibria',
+                        action='store_true', dest='no_symmetry')
+    parser.add_argument('--lazy', action='store_true',
+                        help='only calculate payoffs for the action profiles which are used')
+    parser.add_argument('--numeric', action='store_true',
+                        help='solve with numpy instead of sympy')
+    parser.add_argument('--stats', action='store_true', help='show solver counters and timers at the end')
+    parser.add_argument('--time-limit', type=float, default=None, dest='time_limit',
+                        help='stop finding all equilibria after this many seconds')
+    parser.add_argument('--support-timeout', type=float, default=None, dest='support_timeout',
+                        help='skip supports whose sympy solve takes longer than this many seconds')
+    parser.add_argument('--progress', action='store_true', help='show progress while finding all equilibria')
+    parser.add_argument('--estimate', action='store_true',
+                        help='estimate the work for find_all_equilibria and find_pure without running them')
+    parser.add_argument('--trace', help='write solver events to this file, one JSON object per line')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='after --all, solve the game again with solve_many in this many worker processes and '
+                        'check the equilibria are the same')
+    parser.add_argument('--track', type=float, default=None,
+                        help='after --all, add random noise of this size to the payoffs and track the equilibria')
+    parser.add_argument('--approximate', choices=['fictitious_play', 'regret_matching', 'hedge'],
+                        help='find an approximate equilibrium with this iterative method')
+    parser.add_argument('--iterations', type=int, default=1000, help='iterations for --approximate')
+    parser.add_argument('--restarts', type=int, default=1, help='random restarts for --approximate')
+    parser.add_argument('--k-uniform', type=int, default=None,
+                        help='search the profiles with every probability a multiple of 1/K for the least epsilon')
+    parser.add_argument('--double-oracle', action='store_true',
+                        help='find equilibria by growing a restricted game with best responses')
+    parser.add_argument('--symmetric', action='store_true',
+                        help='give every player the same actions in --double-oracle (symmetric games only)')
+    parser.add_argument('--correlated', action='store_true',
+                        help='find the correlated equilibrium with the highest total payoff')
+    parser.add_argument('--qre', action='store_true',
+                        help='follow the logit quantal response equilibrium curve to a nash equilibrium')
+    parser.add_argument('--best-response', type=int, default=None, metavar='WALKERS',
+                        help='look for pure equilibria with best response dynamics from this many random profiles')
+    parser.add_argument('--evolve', choices=['rk4', 'discrete'],
+                        help='evolve random populations with the replicator dynamics (symmetric games only)')
+    parser.add_argument('--samples', type=int, default=1000, help='starting populations for --evolve')
+    parser.add_argument('--sweep', help='find the equilibria over a range of a payoff parameter, e.g. "stag=1:30:59" '
+                        'for 59 values from 1 to 30')
     args = parser.parse_args()
     agame = None
     profile = None
     game_fun = get_game_fun(args.game)
+    kwargs = {}
+    if args.anonymous:
+        if game_fun not in anonymous_games:
+            raise ValueError("No anonymous version of {}".format(args.game))
+        kwargs['anonymous'] = True
+    if args.lazy:
+        if game_fun not in lazy_games:
+            raise ValueError("No lazy version of {}".format(args.game))
+        kwargs['lazy'] = True
+    if args.sweep:
+        sweep_name, sweep_range = args.sweep.split('=')
+        if sweep_name not in parametric_games.get(game_fun, []):
+            raise ValueError("{} has no parameter {}".format(args.game, sweep_name))
+        start, stop, num = sweep_range.split(':')
+        sweep_values = np.linspace(float(start), float(stop), int(num))
+        from sympy import Symbol # only here, so sympy isn't loaded for --numeric
+        kwargs[sweep_name] = Symbol(sweep_name)
     if game_fun in m_games:
-        agame = game_fun(args.players, args.m)
+        agame = game_fun(args.players, args.m, **kwargs)
     else:
-        agame = game_fun(args.players)
+        agame = game_fun(args.players, **kwargs)
+    agame.verbose = args.verbose
+    if args.numeric:
+        agame.numeric = True
+    if args.trace:
+        trace = EventLog(args.trace)
+        agame.subscribe(trace)
+    if args.stats:
+        if args.anonymous:
+            raise ValueError("Stats are only collected for Game")
+        agame.stats = SolverStats()
 
     if args.payoffs:
         print('payoffs:')
@@ -83,7 +167,11 @@ if __name__ == '__main__':
         print('one_player', agame.one_player_payoffs(others))
     if args.pure:
         print('pure:')
-        print(repr(agame.find_pure()))
+        if args.anonymous:
+            # one entry per equilibrium, how many players of each type play each action
+            print(repr(agame.find_pure_counts()))
+        else:
+            print(repr(agame.find_pure()))
     if args.canned:
         profile = get_canned_profile(game_fun, args.players)
         print('profile:')
@@ -111,18 +199,129 @@ if __name__ == '__main__':
         ne = agame.find_support_equilibria(support)
         print('nash equilibria:')
         print(ne)
+    if args.estimate:
+        print('estimate:')
+        for key, value in agame.estimate_work().items():
+            print(key, value)
+    if args.symmetries:
+        print('symmetries:')
+        print(agame.symmetries())
+        print('is_symmetric:', agame.is_symmetric())
+    deadline = None
+    if args.time_limit is not None:
+        deadline = time.time() + args.time_limit
+    use_symmetry = False if args.no_symmetry else None
     if args.all:
-        all_nash = agame.find_all_equilibria()
+        progress = None
+        if args.progress:
+            progress = lambda fraction, found: print('progress {:.1%} found {}'.format(fraction, found))
+        all_nash = agame.find_all_equilibria(use_symmetry=use_symmetry, deadline=deadline,
+                                             progress=progress, support_timeout=args.support_timeout)
+        found = []
         for anash in all_nash:
+            found.append(anash)
             print(anash)
             # anash looks like [{0: 4/9, 1: 5/9}, {0: 2/9, 1: 7/9}]
             profile = []
             for elm in anash:
                 profile.append([(key, elm[key]) for key in elm])
             print(agame.get_profile_payoffs(profile))
+        print('status:', agame.solve_status)
+        if agame.timed_out_supports:
+            print('timed out supports:', agame.timed_out_supports)
+        if args.workers is not None:
+            from pymnash.batch import solve_many
+            for game_id, result in solve_many([agame], workers=args.workers, use_symmetry=use_symmetry,
+                                              support_timeout=args.support_timeout):
+                if isinstance(result, Exception):
+                    raise result
+                same = repr(result) == repr(found)
+                print('solve_many with {} workers: {}'.format(args.workers, 'same' if same else 'DIFFERENT'))
+                if not same:
+                    print(result)
+        if args.track is not None:
+            agame.update_payoffs(np.random.default_rng().normal(scale=args.track, size=agame.payoffs.shape))
+            start = time.time()
+            tracked = agame.track_equilibria(found)
+            print('tracked in {:.3f} seconds:'.format(time.time() - start))
+            for anash in tracked:
+                print(anash)
+            if agame.tracking_failed:
+                print('could not track', agame.tracking_failed, 'so solved again')
+    if args.approximate:
+        result = agame.find_approximate_equilibrium(args.approximate, iterations=args.iterations,
+                                                    restarts=args.restarts, deadline=deadline)
+        print('approximate equilibrium:')
+        print(result['equilibrium'])
+        print('epsilon', result['epsilon'], 'after', result['iterations'], 'iterations', result['status'])
+    if args.k_uniform:
+        result = agame.find_k_uniform_equilibrium(args.k_uniform, deadline=deadline)
+        print('k-uniform equilibrium:')
+        print(result['equilibrium'])
+        print('epsilon', result['epsilon'], 'after', result['evaluated'], 'profiles,', result['pruned'], 'pruned',
+              result['status'])
+    if args.double_oracle:
+        result = agame.find_double_oracle_equilibria(symmetric=args.symmetric, deadline=deadline)
+        print('double oracle equilibria:')
+        for anash in result['equilibria']:
+            print(anash)
+        print(result['status'], 'after', result['iterations'], 'iterations with actions', result['actions'])
+    if args.correlated:
+        result = agame.find_correlated_equilibrium()
+        print('correlated equilibrium:')
+        for actions, prob in result['distribution'].items():
+            print(actions, prob)
+        print('total payoff', result['value'], 'payoffs', result['payoffs'])
+    if args.qre:
+        result = agame.find_quantal_response_equilibrium(deadline=deadline)
+        print('quantal response equilibrium:')
+        print(result['equilibrium'])
+        print('lambda', result['lambda'], 'epsilon', result['epsilon'], 'after', result['steps'], 'steps',
+              result['status'], 'refined' if result['refined'] else 'not refined')
+    if args.best_response:
+        result = agame.find_pure_best_response(walkers=args.best_response, deadline=deadline)
+        print('best response pure equilibria:')
+        for actions in result['equilibria']:
+            print(actions)
+        print(result['converged'], 'of', args.best_response, 'walkers converged after', result['rounds'], 'rounds',
+              result['status'], 'potential game' if result['potential'] else '')
+    if args.evolve:
+        print('evolutionary states:')
+        for group in agame.find_evolutionary_states(samples=args.samples, method=args.evolve):
+            print(group)
+    if args.sweep:
+        for solution, probabilities, valid in agame.find_parametric_equilibria({sweep_name: sweep_values}):
+            print(solution)
+            print('equilibrium at {} of {} points, {} from {} to {}'.format(valid.sum(), valid.size, sweep_name,
+                  sweep_values[valid].min(), sweep_values[valid].max()))
+    if args.stats:
+        print('stats:')
+        for key, value in agame.get_stats().items():
+            print(key, value)
+    if args.trace:
+        trace.close()
 
 #./test_sample_games.py --game battle --support "[[0,1,2], [0,1,2], [0,1,2]]" # this will give unique probs
 #./test_sample_games.py --game battle --support "[[1,2], [1,2], [1,2]]"
 #./test_sample_games.py --game battle --players 4 --support "[[1,2], [1,2], [0,3], [0, 3]]" # this should give lines of solutions.
 
+#./test_sample_games.py --game all_pay --players 3 --m 3 --lazy --profile "[[1,0,0,0], [1,0,0,0], [1,0,0,0]]"
+#./test_sample_games.py --game stag --players 40 --m 10 --anonymous --pure
+#./test_sample_games.py --game dunderheads --players 30 --anonymous --canned
+#./test_sample_games.py --game stag --players 3 --m 2 --all --stats
+#./test_sample_games.py --game chicken --players 12 --estimate
+#./test_sample_games.py --game how_low --players 2 --m 5 --all --numeric
+#./test_sample_games.py --game chicken --players 3 --all --numeric
+#./test_sample_games.py --game chicken --players 3 --all --numeric --workers 2
+#./test_sample_games.py --game all_pay --players 3 --m 3 --all --time-limit 30 --support-timeout 5 --progress
+#./test_sample_games.py --game chicken --players 3 --all --trace chicken_events.jsonl
+#./test_sample_games.py --game stag --players 3 --m 2 --sweep "stag=1:30:59"
+#./test_sample_games.py --game chicken --players 3 --all --track 0.01
+#./test_sample_games.py --game how_low --players 6 --m 5 --approximate fictitious_play --restarts 4
+#./test_sample_games.py --game how_low --players 4 --m 5 --k-uniform 3
+#./test_sample_games.py --game how_low --players 4 --m 20 --lazy --double-oracle --symmetric
+#./test_sample_games.py --game all_pay --players 3 --m 6 --lazy --correlated
+#./test_sample_games.py --game how_low --players 6 --m 5 --qre
+#./test_sample_games.py --game detente --players 20 --m 4 --lazy --best-response 1000
+#./test_sample_games.py --game stag --players 5 --m 3 --evolve rk4 --samples 5000
 #./test_sample_games.py --game detente --players 4 --m 2 --others "[[1, [[0,1]]], [2, [[0, 0.5], [1, 0.5]]], [3, [[0, 0.5], [1, 0.5]]]]"
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+
+"""Check that the vectorized sample game generators produce the same payoffs as the original
+   cell by cell implementations, which are kept here for reference, and that PolymatrixGame agrees with the
+   dense Game it converts to."""
+
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from pymnash.sample_games import *
+from pymnash.polymatrix import polymatrix_from_bimatrix
+from pymnash.util import coords_from_pos, iterindices, enumershape
+
+
+def loop_battle_of_genders(n):
+    boga = np.zeros(tuple([n] * (n + 1)), dtype=float)
+    for ii in range(n):
+        loc = boga
+        for jj in range(n):
+            loc = loc[ii]
+        for kk in range(n):
+            if kk == ii:
+                loc[kk] = n
+            else:
+                 loc[kk] = 1
+    return boga
+
+def loop_detente_of_genders(n, m):
+    shape = [m] * n
+    shape.append(n)
+    payoffs = np.zeros(tuple(shape), dtype=float)
+    for pos in iterindices(shape[:-1]):
+        counts = [0] * m
+        for pospos in pos:
+            counts[pospos] +=1
+        for ii in range(n):
+            type_ = int(ii/m)
+            action = pos[ii]
+            action_score = counts[action] - 1
+            if action == type_:
+                action_score *= 2
+            there = list(pos)
+            there.append(ii)
+            payoffs[tuple(there)] = action_score
+    return payoffs
+
+def loop_reducible(n):
+    twoplayer = [[[4,3], [5,1], [6,2]],
+                 [[2,1], [8,4], [3,6]],
+                 [[3,0], [9,6], [2,8]]]
+    thetuple = tuple([3, 3] + [2] * (n - 2) +  [n])
+    payoffs = np.zeros(thetuple)
+    for indices in iterindices(payoffs.shape):
+        player = indices[len(indices) - 1]
+        if player in [0, 1]:
+             payoffs[indices] = twoplayer[indices[0]][indices[1]][player]
+        elif indices[player] == 0:
+             payoffs[indices] = 1
+    return payoffs
+
+def loop_dunderheads(n):
+    payoffs = np.zeros(tuple([2] * n + [n]), dtype=float)
+    for indices in iterindices(payoffs.shape):
+        good = True
+        bad = True
+        for ii in range(len(indices) - 1):
+            if indices[ii] == 1:
+                good = False
+            elif indices[ii] == 0:
+                bad = False
+        if good:
+            payoffs[indices] = 3.0
+        if bad:
+            payoffs[indices] = 1.0
+    return payoffs
+
+def loop_prisoners_dilemma(n):
+    payoffs = np.zeros(tuple(([2] * n + [n])), dtype=float)
+    for ii in range(np.prod(payoffs.shape)):
+        coords = coords_from_pos(payoffs, ii)
+        player = coords[ n ]
+        he_defected = bool(coords[player])
+        total_defected = sum(coords[:-1])
+        if total_defected == 0:
+            payoffs[coords] = -1
+        elif he_defected and total_defected  == 1:
+            payoffs[coords] = 0
+        elif he_defected:
+             payoffs[coords] = -3
+        else:
+             payoffs[coords] = -5
+    return payoffs
+
+def loop_matching_pennies(n):
+    payoffs = np.zeros(tuple([n] * (n + 1)), dtype=float)
+    for ii in range(np.prod(payoffs.shape)):
+        coords = coords_from_pos(payoffs, ii)
+        player = coords[ n ]
+        sum_played = sum(coords[:-1])
+        if sum_played % n == player:
+            payoffs[coords] = n - 1
+        else:
+            payoffs[coords] = -1
+    return payoffs
+
+def loop_how_low_dare_you_go(n, m):
+    payoffs = np.zeros(tuple(([m] * n + [n])), dtype=float)
+    for jj, coords in enumershape(payoffs.shape[:-1]):
+        counts = defaultdict(int)
+        win = None
+        for iii in range(len(coords)):
+            counts[coords[iii]] += 1
+        for ii in sorted(counts.keys()):
+            if counts[ii] == 1:
+                win = ii
+                break
+        if win is not None:
+            for player_index in range(len(coords)):
+                if coords[player_index] == win:
+                    pos = list(coords)
+                    pos.append(player_index)
+                    payoffs[tuple(pos)] = 1
+    return payoffs
+
+def loop_mixed_dom(n, m):
+    payoffs = np.zeros(tuple((m + 1, m, 2)), dtype=float)
+    for ii in range(m):
+        payoffs[ii][ii][0] = m + 1
+        payoffs[ii][ii][1] = -1 * (m + 1)
+        payoffs[m][ii][0] = 1
+        payoffs[m][ii][1] = -1
+    return payoffs
+
+def loop_chicken(n):
+    payoffs = np.zeros(tuple([2] * n + [n]), dtype=float)
+    shape = payoffs.shape[:-1]
+    for pos in iterindices(shape):
+        hawks = 0
+        for ii in range(len(shape)):
+            if pos[ii] == 1:
+                hawks += 1
+        for ii in range(n):
+            where = tuple(list(pos) + [ii])
+            if hawks == 1:
+                if pos[ii] == 1:
+                    payoffs[where] = 5
+                else:
+                    payoffs[where] = -1
+            elif hawks > 1:
+                if pos[ii] == 1:
+                    payoffs[where] = -10
+    return payoffs
+
+def loop_stag_hunt(n, m):
+    payoffs = np.zeros(tuple([2] * n + [n]), dtype=float)
+    shape = payoffs.shape[:-1]
+    for pos in iterindices(shape):
+        hunters = 0
+        for ii in range(len(shape)):
+            if pos[ii] == 1:
+                hunters += 1
+        for ii in range(n):
+            where = tuple(list(pos) + [ii])
+            if pos[ii] == 0:
+                payoffs[where] = 1
+            else:
+                if hunters >= m:
+                    payoffs[where] = 4 * n / hunters
+    return payoffs
+
+def loop_all_pay_auction(n, m):
+    if n == 2:
+        prize = 1.5 * m
+    else:
+        prize = 2 * m
+    payoffs = np.zeros(tuple([m + 1] * n + [n]), dtype=float)
+    shape = payoffs.shape[:-1]
+    for  pos in iterindices(shape):
+        max_bid = None
+        for ii, elm in enumerate(pos):
+            if max_bid is None or elm > max_bid:
+                max_bid = elm
+                winners = [ii]
+            elif elm == max_bid:
+                winners.append(ii)
+        for ii in range(n):
+            where = list(pos)
+            where.append(ii)
+            if ii in winners:
+                payoffs[tuple(where)] = prize / len(winners) - where[ii]
+            else:
+                payoffs[tuple(where)] = -where[ii]
+    return payoffs
+
+
+# game function, reference function, list of argument tuples to compare
+cases = [(battle_of_genders, loop_battle_of_genders, [(2,), (3,), (4,)]),
+         (detente_of_genders, loop_detente_of_genders, [(3, 2), (4, 2), (5, 3)]),
+         (reducible, loop_reducible, [(2,), (3,), (5,)]),
+         (dunderheads, loop_dunderheads, [(2,), (3,), (6,)]),
+         (prisoners_dilemma, loop_prisoners_dilemma, [(2,), (3,), (6,)]),
+         (matching_pennies, loop_matching_pennies, [(2,), (3,), (4,)]),
+         (how_low_dare_you_go, loop_how_low_dare_you_go, [(2, 3), (3, 4), (4, 5)]),
+         (mixed_dom, loop_mixed_dom, [(2, 2), (2, 5)]),
+         (chicken, loop_chicken, [(2,), (3,), (6,)]),
+         (stag_hunt, loop_stag_hunt, [(2, 1), (3, 2), (6, 3)]),
+         (all_pay_auction, loop_all_pay_auction, [(2, 2), (3, 3), (4, 4)]),
+        ]
+
+def check_all(verbose=False):
+    """Compare every case, returns a list of the (name, args) which differ."""
+    failed = []
+    for fun, loop_fun, arg_list in cases:
+        for args in arg_list:
+            payoffs = fun(*args).payoffs
+            expected = loop_fun(*args)
+            same = payoffs.shape == expected.shape and np.array_equal(payoffs, expected)
+            if verbose or not same:
+                print(fun.__name__, args, 'same' if same else 'DIFFERENT')
+            if not same:
+                failed.append((fun.__name__, args))
+    return failed
+
+def ring_game(n, payoffs):
+    """A polymatrix game where player ii plays the two-player game payoffs against player ii + 1, round a ring."""
+    return polymatrix_from_bimatrix(n, [(ii, (ii + 1) % n) for ii in range(n)], payoffs)
+
+def check_polymatrix(verbose=False, profiles=5, seed=0):
+    """Compare PolymatrixGame's find_pure, get_profile_payoffs and best_responses on ring games with the Game
+       built by to_dense. Returns a list of the (name, args) which differ."""
+    rng = np.random.default_rng(seed)
+    bimatrices = {'coordination': [[[2, 2], [0, 0]], [[0, 0], [1, 1]]],
+                  'matching_pennies': [[[1, -1], [-1, 1]], [[-1, 1], [1, -1]]],
+                  'random': rng.integers(-3, 4, size=(3, 3, 2))}
+    failed = []
+    for name, payoffs in bimatrices.items():
+        for n in (3, 4, 5):
+            poly = ring_game(n, payoffs)
+            dense = poly.to_dense()
+            pure = sorted(poly.find_pure())
+            dense_pure = sorted(tuple(list(action)[0] for action in eq) for eq in dense.find_pure(simple=False))
+            same = pure == dense_pure
+            for ii in range(profiles):
+                mixes = [rng.dirichlet(np.ones(poly.num_actions(player))) for player in range(n)]
+                pairs = [[[action, prob] for action, prob in enumerate(mix)] for mix in mixes]
+                same = same and np.allclose(poly.get_profile_payoffs(mixes),
+                                            [float(payoff) for payoff in dense.get_profile_payoffs(pairs)])
+                same = same and poly.best_responses(mixes) == dense.best_responses([list(mix) for mix in mixes])
+            if verbose or not same:
+                print('ring', name, (n,), 'same' if same else 'DIFFERENT')
+            if not same:
+                failed.append(('ring ' + name, (n,)))
+    return failed
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    parser = ArgumentParser()
+    parser.add_argument('--verbose', action='store_true', help='show every case, not just failures')
+    parser.add_argument('--time', action='store_true', help='time generating some large games')
+    args = parser.parse_args()
+    failed = check_all(args.verbose) + check_polymatrix(args.verbose)
+    print('{} cases differ'.format(len(failed)))
+    if args.time:
+        for fun, fun_args in [(all_pay_auction, (6, 10)), (detente_of_genders, (8, 4)),
+                              (how_low_dare_you_go, (6, 10)), (stag_hunt, (16, 8))]:
+            start = time.perf_counter()
+            agame = fun(*fun_args)
+            print(fun.__name__, fun_args, 'cells', agame.payoffs.size,
+                  'seconds {:.3f}'.format(time.perf_counter() - start))
+    if failed:
+        raise SystemExit(1)
+
+# ./test_vectorized_games.py --verbose --time